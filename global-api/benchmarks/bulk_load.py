@@ -0,0 +1,129 @@
+# benchmark the importer writes: one transaction per row (the former
+# insert_record) against the batched COPY + INSERT ... ON CONFLICT loader
+# >> python benchmarks/bulk_load.py --database_uri DB_URI --rows 200000
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, text
+from sqlalchemy.dialects.postgresql import UUID
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "importer"))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+
+metadata_obj = MetaData()
+
+# shaped like GridCellEmissionsEdgar
+table = Table(
+    "bulk_load_benchmark",
+    metadata_obj,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("year", Integer),
+    Column("reference_number", String),
+    Column("gas", String),
+    Column("emissions_quantity", Float),
+    Column("emissions_quantity_units", String),
+    Column("cell_lat", Integer),
+    Column("cell_lon", Integer),
+    Column("created_date", String),
+)
+
+
+def synthetic_records(n, seed=42):
+    rng = random.Random(seed)
+    created_date = str(datetime.now())
+    for i in range(n):
+        yield {
+            "id": str(uuid.uuid3(uuid.NAMESPACE_OID, f"benchmark{i}")),
+            "year": 2021,
+            "reference_number": rng.choice(["I.3.1", "II.1.1"]),
+            "gas": rng.choice(["CO2", "CH4", "N2O"]),
+            "emissions_quantity": rng.uniform(0, 1e6),
+            "emissions_quantity_units": "kg yr-1",
+            "cell_lat": rng.randint(-900, 900),
+            "cell_lon": rng.randint(-1800, 1800),
+            "created_date": created_date,
+        }
+
+
+def insert_record(engine, table, pkey, record):
+    """the per-row insert the importers used before the bulk loader"""
+    fields = [col.name for col in table.columns]
+
+    table_data = {key: record.get(key) for key in record.keys() if key in fields}
+
+    pkey_value = table_data.get(pkey)
+
+    with engine.begin() as conn:
+        pkey_exists = conn.execute(
+            table.select().where(table.columns[pkey] == pkey_value)
+        ).fetchone()
+
+        if not pkey_exists:
+            ins = table.insert().values(**table_data)
+            conn.execute(ins)
+
+
+def reset(engine):
+    metadata_obj.drop_all(engine)
+    metadata_obj.create_all(engine)
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<32} {rows:>9} rows in {seconds:8.2f}s  {rows / seconds:>10.0f} rows/s")
+
+
+def count_rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM bulk_load_benchmark;")).scalar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--database_uri",
+        help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
+        default=os.environ.get("DB_URI"),
+    )
+    parser.add_argument("--rows", type=int, default=200_000, help="rows for the bulk loader")
+    parser.add_argument(
+        "--legacy_rows", type=int, default=5_000, help="rows for the per-row inserts"
+    )
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_uri)
+
+    reset(engine)
+    timed(
+        "per-row insert_record",
+        args.legacy_rows,
+        lambda: [
+            insert_record(engine, table, "id", record)
+            for record in synthetic_records(args.legacy_rows)
+        ],
+    )
+
+    def bulk_load():
+        with BulkLoader(engine, table, "id", args.batch_size) as loader:
+            loader.add_many(synthetic_records(args.rows))
+
+    reset(engine)
+    timed(f"bulk loader (batch {args.batch_size})", args.rows, bulk_load)
+    print(f"rows in table: {count_rows(engine)}")
+
+    # a second pass conflicts on every id and writes nothing
+    timed("bulk loader, all conflicting", args.rows, bulk_load)
+    print(f"rows in table: {count_rows(engine)}")
+
+    metadata_obj.drop_all(engine)
@@ -0,0 +1,170 @@
+# benchmark the ClimateTRACE point serialization over a synthetic city
+# >> python benchmarks/climatetrace_points.py --assets 50000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+for key in ["PROJECT_NAME", "DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST"]:
+    os.environ.setdefault(key, "benchmark")
+os.environ.setdefault("DB_PORT", "5432")
+
+from routes.city_locode_endpoint import (  # noqa: E402
+    asset_points,
+    gpc_quality_data,
+    gpc_quality_EF,
+    not_nan_or_none,
+)
+from utils.emissions import gwp_factors  # noqa: E402
+from utils.records import records_to_columns  # noqa: E402
+
+Asset = namedtuple(
+    "Asset",
+    [
+        "id",
+        "asset_id",
+        "reference_number",
+        "gas",
+        "emissions_quantity",
+        "emissions_quantity_units",
+        "emissions_factor",
+        "emissions_factor_units",
+        "capacity",
+        "capacity_units",
+        "capacity_factor",
+        "activity",
+        "activity_units",
+        "asset_name",
+        "lat",
+        "lon",
+    ],
+)
+
+
+def synthetic_city(n_assets, seed=42):
+    """rows shaped like the asset table for one road-transport heavy city"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_assets):
+        rows.append(
+            Asset(
+                id=f"{i:032x}",
+                asset_id=100000 + i,
+                reference_number="II.1.1",
+                gas=rng.choice(["co2", "ch4", "n2o", "co2e_100yr", "co2e_20yr"]),
+                emissions_quantity=rng.randint(0, 10**9),
+                emissions_quantity_units="kg",
+                emissions_factor=rng.random() if rng.random() > 0.1 else None,
+                emissions_factor_units="tonnes_co2e/vkm",
+                capacity=rng.uniform(0, 1e5) if rng.random() > 0.2 else None,
+                capacity_units="vkm",
+                capacity_factor=None,
+                activity=rng.uniform(0, 1e7),
+                activity_units="vkm",
+                asset_name=f"road segment {i}",
+                lat=rng.uniform(-90, 90),
+                lon=rng.uniform(-180, 180),
+            )
+        )
+    return rows
+
+
+def legacy_points(records):
+    """the previous implementation, one single-row dataframe per asset"""
+    gases = ["co2", "ch4", "n2o"]
+    df = pd.DataFrame(records)
+    list_of_points = []
+    for _, row_data in df.iterrows():
+        row = row_data.to_frame().T
+        gas = row["gas"].item()
+        if gas in gases and not_nan_or_none(row["emissions_quantity"].item()):
+            gwp100 = gwp_factors()["100yr"][gas]
+            gwp20 = gwp_factors()["20yr"][gas]
+            capacity_factor = (
+                row["capacity_factor"].to_string(index=False, header=False).strip()
+            )
+            list_of_points.append(
+                {
+                    "ownership": {
+                        "asset_name": row["asset_name"].item(),
+                        "asset_id": row["asset_id"].item(),
+                        "lat": row["lat"].to_string(index=False, header=False).strip(),
+                        "lon": row["lon"].to_string(index=False, header=False).strip(),
+                    },
+                    "capacity": {
+                        "value": row["capacity"]
+                        .to_string(index=False, header=False)
+                        .strip(),
+                        "units": row["capacity_units"].item(),
+                        "factor": capacity_factor if capacity_factor != "None" else "NA",
+                    },
+                    "activity": {
+                        "value": row["activity"]
+                        .to_string(index=False, header=False)
+                        .strip(),
+                        "units": row["activity_units"].item(),
+                        "gpc_quality": str(gpc_quality_data),
+                    },
+                    "emissions_factor": {
+                        "gas": gas,
+                        "value": row["emissions_factor"]
+                        .to_string(index=False, header=False)
+                        .strip(),
+                        "units": row["emissions_factor_units"].item(),
+                        "gpc_quality": str(gpc_quality_EF),
+                    },
+                    "emissions": {
+                        "gas": gas,
+                        "value": row["emissions_quantity"]
+                        .to_string(index=False, header=False)
+                        .strip(),
+                        "units": row["emissions_quantity_units"].item(),
+                        "co2eq_100yr": str(row["emissions_quantity"].item() * gwp100),
+                        "co2eq_20yr": str(row["emissions_quantity"].item() * gwp20),
+                        "gpc_quality": str(gpc_quality_data),
+                    },
+                }
+            )
+    return list_of_points
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--assets", type=int, default=50_000, help="number of assets")
+    parser.add_argument(
+        "--skip_legacy", action="store_true", help="only time the columnar path"
+    )
+    args = parser.parse_args()
+
+    records = synthetic_city(args.assets)
+
+    columnar, columnar_seconds = timed(
+        lambda rows: asset_points(records_to_columns(rows)), records
+    )
+    print(f"columnar: {len(columnar)} points in {columnar_seconds:.3f}s")
+
+    if not args.skip_legacy:
+        legacy, legacy_seconds = timed(legacy_points, records)
+        print(f"legacy:   {len(legacy)} points in {legacy_seconds:.3f}s")
+
+        identical = json.dumps(legacy) == json.dumps(columnar)
+        print(f"identical JSON: {identical}")
+        print(f"speedup: {legacy_seconds / columnar_seconds:.1f}x")
+
+        if not identical:
+            sys.exit(1)
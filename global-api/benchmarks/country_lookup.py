@@ -0,0 +1,145 @@
+# benchmark the country_code / citywide_emissions lookups with and without
+# the composite covering index, over a synthetic table built in the database
+# >> python benchmarks/country_lookup.py --database_uri DB_URI --rows 10000000
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, text
+
+GASES = ["co2", "ch4", "n2o", "co2e"]
+SOURCES = 10
+REFNOS = 100
+COUNTRIES = 250
+YEARS = 25
+
+# the query of /api/v0/source/{source_name}/country/{country_code}/{year}/{GPC_refno}
+LOOKUP = """
+    SELECT gas_name, emissions_value FROM country_code_benchmark
+    WHERE source_name = :source_name
+    AND "GPC_refno" = :GPC_refno
+    AND country_code = :country_code
+    AND year = :year;
+    """
+
+# the query of the city inventory, every source and sector of a country
+INVENTORY = """
+    SELECT source_name, "GPC_refno", gas_name, emissions_value FROM country_code_benchmark
+    WHERE country_code = :country_code
+    AND year = :year;
+    """
+
+
+def create_table(conn, rows):
+    """one row per gas of each (source, sector, country, year), generated server-side"""
+    conn.execute(text("DROP TABLE IF EXISTS country_code_benchmark;"))
+    conn.execute(
+        text(
+            f"""
+            CREATE UNLOGGED TABLE country_code_benchmark AS
+            SELECT
+                gen_random_uuid() AS id,
+                'source_' || (i / 4 % {SOURCES}) AS source_name,
+                'I.' || (i / {4 * SOURCES} % {REFNOS}) AS "GPC_refno",
+                'country ' || (i / {4 * SOURCES * REFNOS} % {COUNTRIES}) AS country_name,
+                'C' || (i / {4 * SOURCES * REFNOS} % {COUNTRIES}) AS country_code,
+                'annual' AS temporal_granularity,
+                (2000 + i / {4 * SOURCES * REFNOS * COUNTRIES} % {YEARS})::float AS year,
+                'activity' AS activity_name,
+                NULL::varchar AS activity_value,
+                NULL::varchar AS activity_units,
+                (ARRAY{GASES})[1 + i % 4] AS gas_name,
+                (random() * 1e9)::varchar AS emissions_value,
+                'kg' AS emissions_units
+            FROM generate_series(0, :rows - 1) AS i;
+            """
+        ),
+        {"rows": rows},
+    )
+    conn.execute(text("ANALYZE country_code_benchmark;"))
+
+
+def create_index(conn):
+    conn.execute(
+        text(
+            """
+            CREATE INDEX ix_country_code_benchmark_lookup
+            ON country_code_benchmark (country_code, year, source_name, "GPC_refno")
+            INCLUDE (gas_name, emissions_value);
+            """
+        )
+    )
+    # the visibility map lets the planner use index-only scans
+    conn.execute(text("VACUUM ANALYZE country_code_benchmark;"))
+
+
+def lookup_params(n, rows, seed=42):
+    rng = random.Random(seed)
+    years = max(1, min(YEARS, rows // (4 * SOURCES * REFNOS * COUNTRIES)))
+    return [
+        {
+            "source_name": f"source_{rng.randrange(SOURCES)}",
+            "GPC_refno": f"I.{rng.randrange(REFNOS)}",
+            "country_code": f"C{rng.randrange(COUNTRIES)}",
+            "year": 2000 + rng.randrange(years),
+        }
+        for _ in range(n)
+    ]
+
+
+def time_queries(conn, query, params):
+    """latency (ms) of each query and the plan of the first one"""
+    plan = conn.execute(text(f"EXPLAIN {query}"), params[0]).scalars().all()
+    timings = []
+    for param in params:
+        start = time.perf_counter()
+        conn.execute(text(query), param).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, plan
+
+
+def report(label, timings, plan):
+    scan = next((line.strip() for line in plan if "Scan" in line), plan[0].strip())
+    print(
+        f"{label:<28} median {statistics.median(timings):9.3f} ms"
+        f"  max {max(timings):9.3f} ms  [{scan}]"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--database_uri",
+        help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
+        default=os.environ.get("DB_URI"),
+    )
+    parser.add_argument("--rows", type=int, default=10_000_000, help="rows in the table")
+    parser.add_argument("--queries", type=int, default=20, help="lookups per run")
+    parser.add_argument(
+        "--keep", action="store_true", help="keep country_code_benchmark afterwards"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_uri)
+    params = lookup_params(args.queries, args.rows)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        start = time.perf_counter()
+        create_table(conn, args.rows)
+        print(f"table: {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        report("lookup, no index", *time_queries(conn, LOOKUP, params))
+        report("inventory, no index", *time_queries(conn, INVENTORY, params))
+
+        start = time.perf_counter()
+        create_index(conn)
+        print(f"index built in {time.perf_counter() - start:.1f}s")
+
+        report("lookup, covering index", *time_queries(conn, LOOKUP, params))
+        report("inventory, covering index", *time_queries(conn, INVENTORY, params))
+
+        if not args.keep:
+            conn.execute(text("DROP TABLE country_code_benchmark;"))
@@ -0,0 +1,95 @@
+# load test a running API with many concurrent clients
+# >> uvicorn main:app --port 8000 &
+# >> python benchmarks/load_test.py --clients 200 --duration 30
+#
+# Run the server against a local Postgres loaded with the importers, and
+# with CACHE_MAX_ENTRIES=0 to measure the database path rather than the
+# response cache. Every client loops over the paths until the time is up.
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import aiohttp
+
+DEFAULT_PATHS = [
+    "/health",
+    "/api/v0/catalogue/last-update",
+    "/api/v0/climatetrace/city/US NYC/2022/II.1.1",
+    "/api/v0/edgar/city/US NYC/2022/II.1.1",
+    "/api/v0/ghgrp_epa/city/US NYC/2022/I.3.1",
+    "/api/v0/crosswalk/city/US NYC/2022/I.1.1",
+]
+
+
+async def client(session, base_url, paths, deadline, latencies, statuses):
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except aiohttp.ClientError as error:
+            statuses[type(error).__name__] += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def run(base_url, paths, clients, duration):
+    latencies = []
+    statuses = Counter()
+
+    # one connection per client so the server sees `clients` concurrent requests
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(
+            *(
+                client(session, base_url, paths, deadline, latencies, statuses)
+                for _ in range(clients)
+            )
+        )
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    total = sum(statuses.values())
+
+    print(f"{clients} clients for {elapsed:.1f}s against {base_url}")
+    print(f"requests: {total} ({total / elapsed:.1f} req/s)")
+    print("statuses: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)))
+    print(
+        "latency ms: "
+        f"p50={percentile(latencies, 0.50) * 1000:.1f} "
+        f"p95={percentile(latencies, 0.95) * 1000:.1f} "
+        f"p99={percentile(latencies, 0.99) * 1000:.1f} "
+        f"max={(latencies[-1] if latencies else float('nan')) * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--base_url", default="http://localhost:8000", help="root of the running API"
+    )
+    parser.add_argument("--clients", type=int, default=200, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="path to request; repeat for several (default: a mix of endpoints)",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base_url, args.paths or DEFAULT_PATHS, args.clients, args.duration))
@@ -0,0 +1,75 @@
+# benchmark the id column of the EDGAR importer: uuid_generate_v3 in a
+# row-wise DataFrame.apply against the batch helper, checking the ids match
+# >> python benchmarks/uuid_batch.py --rows 1000000 --workers 4
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "importer"))
+
+from common.uuids import uuid_column, uuid_generate_v3  # noqa: E402
+
+COLUMNS = ["cell_lat", "cell_lon", "year", "gas", "reference_number"]
+
+
+def synthetic_cells(n, seed=42):
+    """shaped like the EDGAR frame before its id is assigned"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "lat_center": np.round(rng.uniform(-90, 90, n), 2),
+            "lon_center": np.round(rng.uniform(-180, 180, n), 2),
+        }
+    )
+    return (
+        df.assign(reference_number="I.3.1")
+        .assign(year=2021)
+        .assign(gas="CO2")
+        .assign(cell_lat=lambda row: round(row["lat_center"] * 10))
+        .assign(cell_lon=lambda row: round(row["lon_center"] * 10))
+    )
+
+
+def row_wise(df):
+    return df.apply(
+        lambda row: uuid_generate_v3(
+            f"edgar{str(row['cell_lat'])}{str(row['cell_lon'])}{row['year']}{row['gas']}{row['reference_number']}"
+        ),
+        axis=1,
+    )
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<24} {rows:>9} rows in {seconds:8.2f}s  {rows / seconds:>10.0f} rows/s")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=4, help="processes of the pooled run")
+    args = parser.parse_args()
+
+    df = synthetic_cells(args.rows)
+
+    expected = timed("row-wise apply", args.rows, lambda: row_wise(df))
+    batch = timed(
+        "uuid_column", args.rows, lambda: uuid_column(df, COLUMNS, prefix="edgar")
+    )
+    pooled = timed(
+        f"uuid_column, {args.workers} workers",
+        args.rows,
+        lambda: uuid_column(df, COLUMNS, prefix="edgar", workers=args.workers),
+    )
+
+    assert expected.equals(batch), "batch ids differ from uuid_generate_v3"
+    assert expected.equals(pooled), "pooled ids differ from uuid_generate_v3"
+    print("ids identical")
@@ -87,7 +87,14 @@ def main(inputfile, outputfile, concurrency, origin):
   for _ in range(concurrency):
     threading.Thread(target=worker, daemon=True).start()
 
-  r = http.request('GET', f'{origin}/api/v0/catalogue')
+  r = http.request(
+    'GET',
+    f'{origin}/api/v0/catalogue',
+    fields={
+      'retrieval_method': 'global_api,global_api_downscaled_by_population',
+      'fields': 'retrieval_method,publisher_id,gpc_reference_number,api_endpoint,start_year,end_year',
+    },
+  )
   catalogue = json.loads(r.data.decode('utf-8'))
 
   with open(inputfile, 'r') as file:
@@ -0,0 +1,88 @@
+# production server: gunicorn managing uvicorn worker processes
+# >> gunicorn -c gunicorn.conf.py main:app
+#
+# Every worker has its own database pools (DB_POOL_SIZE + DB_MAX_OVERFLOW
+# connections per engine), so keep
+#   WEB_CONCURRENCY * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# under the max_connections of the database.
+
+import math
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+
+def cpu_limit():
+    """whole cores of the container's cgroup CPU quota, None without a quota;
+    cpu_count() reports the cores of the node, not the container's limit"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2
+            quota, period = f.read().split()[:2]
+    except OSError:
+        try:  # cgroup v1
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+
+    if quota in ("max", "-1"):
+        return None
+    return max(1, math.floor(int(quota) / int(period)))
+
+
+# worker processes; defaults to one per core of the CPU limit, and to a
+# single worker when the container has no limit to size from
+workers = int(
+    os.environ.get(
+        "WEB_CONCURRENCY", min(cpu_limit() or 1, multiprocessing.cpu_count())
+    )
+)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# import the app once in the master and fork the workers from it
+preload_app = True
+
+# seconds an idle client connection is kept open; longer than the
+# idle timeout of the load balancer in front, so it closes first
+keepalive = int(os.environ.get("KEEPALIVE", "75"))
+
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+
+# recycle workers now and then to bound memory growth
+max_requests = int(os.environ.get("MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    from db.database import engine
+    from utils.spatial_index import reload_city_index
+
+    # build the point-to-locode index once in the master, before the first
+    # fork; every worker, including the ones recycled by max_requests,
+    # inherits it instead of loading the osm table itself. If the database
+    # is not reachable yet, each worker builds it on its first lookup.
+    try:
+        reload_city_index()
+    except Exception:
+        server.log.exception("City index not built in the master")
+    finally:
+        engine.dispose()
+
+
+def post_fork(server, worker):
+    from db.database import async_engine, engine
+    from main import log_listener
+
+    # pooled connections must not be shared with the parent process
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+    # the log writer thread of the parent does not survive the fork
+    log_listener.start()
@@ -75,6 +75,7 @@ popd
 pushd importer/edgar
 $python_cmd citycelloverlapedgar_importer.py --database_uri $DB_URI
 $python_cmd gridcellemissionsedgar_importer.py --database_uri $DB_URI
+$python_cmd cityemissionsedgar_importer.py --database_uri $DB_URI
 popd
 
 # Import EPA
@@ -6,6 +6,11 @@ import pandas as pd
 from pathlib import Path
 from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
 
 
 def not_nan_or_none(value):
@@ -33,24 +38,6 @@ def record_generator(fl):
         yield row.to_dict()
 
 
-def insert_record(engine, table, pkey, record):
-    """insert record into table"""
-    fields = [col.name for col in table.columns]
-
-    table_data = {key: record.get(key) for key in record.keys() if key in fields}
-
-    pkey_value = table_data.get(pkey)
-
-    with engine.begin() as conn:
-        pkey_exists = conn.execute(
-            table.select().where(table.columns[pkey] == pkey_value)
-        ).fetchone()
-
-        if not pkey_exists:
-            ins = table.insert().values(**table_data)
-            conn.execute(ins)
-
-
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -60,6 +47,12 @@ if __name__ == "__main__":
     )
     parser.add_argument("--file", help="path to CSV file to import")
     parser.add_argument("--log_file", help="path to log file", default="./importer.log")
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -75,6 +68,7 @@ if __name__ == "__main__":
 
     table = Table("citywide_emissions", metadata_obj, autoload_with=engine)
     fields = [col.name for col in table.columns]
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     df = pd.read_csv(args.file)
 
@@ -96,7 +90,8 @@ if __name__ == "__main__":
                 key: record.get(key) for key in record.keys() if key in fields
             }
 
-            insert_record(engine, table, "id", table_data)
+            loader.add(table_data)
 
+    loader.flush()
     logging.info("Done!")
     session.close()
@@ -7,10 +7,15 @@ import pandas as pd
 from pathlib import Path
 from sqlalchemy import create_engine, insert, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
 import tarfile
-import uuid
 from lat_lon_to_locode import point_to_locode, point_to_lat_lon
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+from common.uuids import uuid_column  # noqa: E402
+
 
 refno_to_assets = {
     "I.4.1": ["./fossil_fuel_operations/asset_oil-and-gas-refining_emissions.csv"],
@@ -44,31 +49,6 @@ def record_generator(fl):
         yield row.to_dict()
 
 
-def insert_record(engine, table, pkey, record):
-    """insert record into table"""
-    fields = [col.name for col in table.columns]
-
-    table_data = {key: record.get(key) for key in record.keys() if key in fields}
-
-    pkey_value = table_data.get(pkey)
-
-    with engine.begin() as conn:
-        pkey_exists = conn.execute(
-            table.select().where(table.columns[pkey] == pkey_value)
-        ).fetchone()
-
-        if not pkey_exists:
-            ins = table.insert().values(**table_data)
-            conn.execute(ins)
-
-
-def uuid_generate_v3(name, namespace=uuid.NAMESPACE_OID):
-    """generate a version 3 UUID from namespace and name"""
-    assert isinstance(name, str), "name needs to be a string"
-    assert isinstance(namespace, uuid.UUID), "namespace needs to be a uuid.UUID"
-    return str(uuid.uuid3(namespace, name))
-
-
 def climatetrace_file_names(file: str) -> list:
     with tarfile.open(file, 'r:gz') as tar:
         return tar.getnames()
@@ -92,6 +72,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--log_file", help="path to log file", default="./climatetrace_importer.log"
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     tar_file = Path(os.path.abspath(args.file))
@@ -111,6 +97,7 @@ if __name__ == "__main__":
 
     asset = Table("asset", metadata_obj, autoload_with=engine)
     fields = [col.name for col in asset.columns]
+    loader = BulkLoader(engine, asset, "id", args.batch_size)
 
     for refno in refno_to_assets.keys():
         logging.info(f"Reference number: {refno}")
@@ -122,6 +109,8 @@ if __name__ == "__main__":
             filename = Path(file).stem
 
             df = load_climatetrace_file(tar_file, file)
+            df["id"] = uuid_column(df, ["start_time", "gas", "st_astext"], prefix=filename)
+
             for _, row in df.iterrows():
                 record = row.to_dict()
 
@@ -147,14 +136,6 @@ if __name__ == "__main__":
                     record["filename"] = filename
                     record["reference_number"] = refno
 
-                    id_string = (
-                        record["filename"]
-                        +record["start_time"]
-                        +record["gas"]
-                        +record["st_astext"]
-                    )
-                    record["id"] = uuid_generate_v3(id_string)
-
                     # remove keys with nan, none, and empty values
                     record = {
                         key: value for key, value in record.items() if not_nan_or_none(value)
@@ -164,7 +145,8 @@ if __name__ == "__main__":
                         key: record.get(key) for key in record.keys() if key in fields
                     }
 
-                    insert_record(engine, asset, "id", table_data)
+                    loader.add(table_data)
 
+    loader.flush()
     logging.info("Done!")
     session.close()
\ No newline at end of file
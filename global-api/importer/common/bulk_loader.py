@@ -0,0 +1,178 @@
+# batched loading of importer records into the ccglobal tables
+#
+# >> import sys
+# >> from pathlib import Path
+# >> sys.path.append(str(Path(__file__).resolve().parents[1]))
+# >> from common.bulk_loader import BulkLoader
+# >>
+# >> with BulkLoader(engine, table, "id", batch_size=10_000) as loader:
+# >>     for record in records:
+# >>         loader.add(record)
+
+import io
+import logging
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+def copy_value(value):
+    """value in the COPY text format; None, NaN and NaT are NULL"""
+    if value is None or value != value:
+        return r"\N"
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    elif isinstance(value, uuid.UUID):
+        value = str(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class BulkLoader:
+    """Write records to a table in batches instead of one transaction per row
+
+    Each batch is staged with COPY into a temporary table and moved into the
+    table with a single `INSERT ... SELECT ... ON CONFLICT (pkey)`. Existing
+    rows are kept (DO NOTHING), or overwritten with `update=True`
+    (DO UPDATE). Keys that are not columns of the table are dropped;
+    columns a record does not set take their default, as with a per-row
+    insert, since the records of a batch are copied in groups of the same
+    columns.
+
+    Requires the psycopg2 driver (postgresql:// URIs).
+    """
+
+    def __init__(self, engine, table, pkey="id", batch_size=DEFAULT_BATCH_SIZE, update=False):
+        self.engine = engine
+        self.table = table
+        self.pkey = pkey
+        self.batch_size = batch_size
+        self.update = update
+        self.fields = [col.name for col in table.columns]
+        self.added = 0
+        self.written = 0
+        self._batch = {}
+
+    def add(self, record):
+        """queue a record; the batch is written once it holds batch_size records
+
+        Within a batch a repeated key keeps the first record, or the last
+        one when updating, as a row at a time would have."""
+        table_data = {key: value for key, value in record.items() if key in self.fields}
+        key = table_data.get(self.pkey)
+
+        if self.update:
+            self._batch[key] = table_data
+        else:
+            self._batch.setdefault(key, table_data)
+        self.added += 1
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, records):
+        for record in records:
+            self.add(record)
+
+    def flush(self):
+        """write the queued records; returns the number of rows written"""
+        if not self._batch:
+            return 0
+
+        records = list(self._batch.values())
+        self._batch = {}
+
+        written = self._write(records)
+        self.written += written
+        logger.info(f"{self.table.name}: {self.written} rows written of {self.added} records")
+        return written
+
+    def _write(self, records):
+        # records setting the same columns; a column left out of a record is
+        # left out of its INSERT, so it takes its default rather than NULL
+        groups = {}
+        for record in records:
+            columns = tuple(name for name in self.fields if name in record)
+            groups.setdefault(columns, []).append(record)
+
+        quote = self.engine.dialect.identifier_preparer.quote
+        target = self.engine.dialect.identifier_preparer.format_table(self.table)
+        staging = quote(f"staging_{self.table.name}")
+
+        written = 0
+
+        with self.engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"CREATE TEMP TABLE {staging} "
+                    f"(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP;"
+                )
+            )
+
+            for columns, group in groups.items():
+                column_list = ", ".join(quote(name) for name in columns)
+
+                buffer = io.StringIO()
+                for record in group:
+                    buffer.write("\t".join(copy_value(record[name]) for name in columns))
+                    buffer.write("\n")
+                buffer.seek(0)
+
+                with conn.connection.cursor() as cursor:
+                    cursor.copy_expert(
+                        f"COPY {staging} ({column_list}) FROM STDIN", buffer
+                    )
+
+                result = conn.execute(
+                    text(
+                        f"""
+                        INSERT INTO {target} ({column_list})
+                        SELECT {column_list} FROM {staging}
+                        ON CONFLICT ({quote(self.pkey)}) {self._on_conflict(columns)};
+                        """
+                    )
+                )
+                written += result.rowcount
+
+                conn.execute(text(f"TRUNCATE {staging};"))
+
+        return written
+
+    def _on_conflict(self, columns):
+        quote = self.engine.dialect.identifier_preparer.quote
+
+        if self.update:
+            assignments = ", ".join(
+                f"{quote(name)} = EXCLUDED.{quote(name)}"
+                for name in columns
+                if name != self.pkey
+            )
+            if assignments:
+                return f"DO UPDATE SET {assignments}"
+
+        return "DO NOTHING"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # the records queued before an error are still written
+        self.flush()
+        return False
+
+
+def load_records(engine, table, records, pkey="id", batch_size=DEFAULT_BATCH_SIZE, update=False):
+    """write an iterable of records with a BulkLoader; returns (records, rows written)"""
+    with BulkLoader(engine, table, pkey, batch_size, update) as loader:
+        loader.add_many(records)
+    return loader.added, loader.written
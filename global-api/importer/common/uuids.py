@@ -0,0 +1,79 @@
+# deterministic ids of importer records, one row or a whole column at a time
+#
+# >> import sys
+# >> from pathlib import Path
+# >> sys.path.append(str(Path(__file__).resolve().parents[1]))
+# >> from common.uuids import uuid_column
+# >>
+# >> df["id"] = uuid_column(df, ["cell_lat", "cell_lon", "year"], prefix="edgar")
+
+import hashlib
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# names hashed by each worker task when a process pool is used
+CHUNK_SIZE = 100_000
+
+
+def uuid_generate_v3(name, namespace=uuid.NAMESPACE_OID):
+    """generate a version 3 UUID from namespace and name"""
+    assert isinstance(name, str), "name needs to be a string"
+    assert isinstance(namespace, uuid.UUID), "namespace needs to be a uuid.UUID"
+    return str(uuid.uuid3(namespace, name))
+
+
+def _uuid3_strings(names, namespace_bytes):
+    """uuid.uuid3 without building a UUID object per name: the MD5 digest of
+    namespace and name with the version and variant bits set"""
+    md5 = hashlib.md5
+    ids = []
+    for name in names:
+        digest = bytearray(
+            md5(namespace_bytes + name.encode("utf-8"), usedforsecurity=False).digest()
+        )
+        digest[6] = (digest[6] & 0x0F) | 0x30  # version 3
+        digest[8] = (digest[8] & 0x3F) | 0x80  # RFC 4122 variant
+        h = digest.hex()
+        ids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return ids
+
+
+def uuid_generate_v3_batch(names, namespace=uuid.NAMESPACE_OID, workers=None):
+    """version 3 UUIDs of a sequence of names, the same as uuid_generate_v3
+
+    With workers > 1 the names are hashed in chunks of CHUNK_SIZE across a
+    process pool; this only pays off for millions of names.
+    """
+    assert isinstance(namespace, uuid.UUID), "namespace needs to be a uuid.UUID"
+    names = list(names)
+    assert all(isinstance(name, str) for name in names), "names need to be strings"
+
+    if not workers or workers <= 1 or len(names) <= CHUNK_SIZE:
+        return _uuid3_strings(names, namespace.bytes)
+
+    chunks = [names[i : i + CHUNK_SIZE] for i in range(0, len(names), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _uuid3_strings, chunks, [namespace.bytes] * len(chunks)
+        )
+        return [id_ for chunk in results for id_ in chunk]
+
+
+def uuid_column(df, columns, prefix="", namespace=uuid.NAMESPACE_OID, workers=None):
+    """version 3 UUIDs of the rows of a DataFrame, as a Series on its index
+
+    The name of each row is prefix followed by the columns formatted with
+    str(), concatenated column-wise; it is the id string the importers build
+    per row, e.g. f"edgar{row['cell_lat']}{row['cell_lon']}{row['year']}".
+    """
+    names = pd.Series(prefix, index=df.index, dtype=object)
+    for column in columns:
+        names = names + df[column].astype(str)
+
+    return pd.Series(
+        uuid_generate_v3_batch(names.tolist(), namespace, workers),
+        index=df.index,
+        dtype=object,
+    )
@@ -14,19 +14,24 @@ import argparse
 from datetime import datetime
 import os
 import pandas as pd
+from pathlib import Path
 from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
 from tqdm import tqdm
 from utils import (
     all_locodes_and_geometries,
     area_of_polygon,
     bounds_from_polygon,
     get_crosswalk_grid_coords_and_wkt,
-    insert_record,
     load_wkt,
     uuid_generate_v3,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -34,6 +39,12 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     engine = create_engine(args.database_uri)
@@ -49,6 +60,7 @@ if __name__ == "__main__":
     )
 
     table = Table("crosswalk_CityGridOverlap", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     lon_res = 0.02
     lat_res = 0.02
@@ -99,6 +111,7 @@ if __name__ == "__main__":
                     "created_date": str(datetime.now()),
                 }
 
-                insert_record(engine, table, "id", record)
+                loader.add(record)
 
+    loader.flush()
     session.close()
\ No newline at end of file
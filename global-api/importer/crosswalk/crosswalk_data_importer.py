@@ -8,17 +8,22 @@ import argparse
 from datetime import datetime
 import os
 import pandas as pd
+from pathlib import Path
 from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
 from utils import (
     tds_catalog,
     tds_generator,
     get_dataset_url,
-    insert_record,
-    uuid_generate_v3,
     get_crosswalk_entire_grid,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+from common.uuids import uuid_column  # noqa: E402
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -26,6 +31,12 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     engine = create_engine(args.database_uri)
@@ -34,6 +45,7 @@ if __name__ == "__main__":
     session = Session()
 
     table = Table("crosswalk_GridCellEmissions", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     results = get_crosswalk_entire_grid(session)
     df_grid = (
@@ -114,11 +126,10 @@ if __name__ == "__main__":
                 .assign(reference_number=gpc_refno)
                 .assign(gas="CO2")
                 .assign(
-                    id=lambda x: x.apply(
-                        lambda row: uuid_generate_v3(
-                            f"crosswalk{row['grid_id']}{row['year']}{row['gas']}{row['reference_number']}"
-                        ),
-                        axis=1,
+                    id=lambda x: uuid_column(
+                        x,
+                        ["grid_id", "year", "gas", "reference_number"],
+                        prefix="crosswalk",
                     )
                 )
                 .assign(created_date=str(datetime.now()))
@@ -139,7 +150,7 @@ if __name__ == "__main__":
 
             record_generator = (record for record in df_final.to_dict(orient="records"))
 
-            for record in record_generator:
-                insert_record(engine, table, "id", record)
+            loader.add_many(record_generator)
 
+    loader.flush()
     session.close()
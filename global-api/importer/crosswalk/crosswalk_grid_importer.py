@@ -8,8 +8,11 @@
 import argparse
 from datetime import datetime
 import os
+from pathlib import Path
 from sqlalchemy import create_engine, MetaData, Table
+import sys
 from tqdm import tqdm
+import xarray as xr
 from utils import (
     area_of_polygon,
     bounding_coords,
@@ -17,10 +20,13 @@ from utils import (
     tds_catalog,
     tds_generator,
     get_dataset_url,
-    insert_record,
     uuid_generate_v3,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -29,6 +35,12 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
     
     # create TDS catalog
@@ -53,6 +65,7 @@ if __name__ == "__main__":
     metadata_obj = MetaData()
 
     table = Table("crosswalk_GridCell", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     lats = ds.lat.values.flatten()
     lons = ds.lon.values.flatten()
@@ -60,22 +73,24 @@ if __name__ == "__main__":
     assert len(lats) == len(lons)
     
     for lat, lon in zip(lats, lons):
-    coords_dict = bounding_coords(
-        lat_center=lat, lon_center=lon, distance_m=500
-    )
+        coords_dict = bounding_coords(
+            lat_center=lat, lon_center=lon, distance_m=500
+        )
 
-    polygon = polygon_from_coords(**coords_dict)
+        polygon = polygon_from_coords(**coords_dict)
 
-    area = area_of_polygon(polygon)
-    cell_id = uuid_generate_v3(polygon.wkt)
+        area = area_of_polygon(polygon)
+        cell_id = uuid_generate_v3(polygon.wkt)
 
-    record = {
-        "id": cell_id,
-        "lat_center": round(float(lat), 2),
-        "lon_center": round(float(lon), 2),
-        "geometry": polygon.wkt,
-        "area": round(area),
-        "created_date": str(datetime.now()),
-    }
-    
-    insert_record(engine, table, "id", record)
\ No newline at end of file
+        record = {
+            "id": cell_id,
+            "lat_center": round(float(lat), 2),
+            "lon_center": round(float(lon), 2),
+            "geometry": polygon.wkt,
+            "area": round(area),
+            "created_date": str(datetime.now()),
+        }
+
+        loader.add(record)
+
+    loader.flush()
@@ -397,24 +397,6 @@ def get_dataset_url(catalog, dataset):
     return catalog.datasets[dataset].access_urls["OPENDAP"]
 
 
-def insert_record(engine, table, pkey, record):
-    """insert record into table"""
-    fields = [col.name for col in table.columns]
-
-    table_data = {key: record.get(key) for key in record.keys() if key in fields}
-
-    pkey_value = table_data.get(pkey)
-
-    with engine.begin() as conn:
-        pkey_exists = conn.execute(
-            table.select().where(table.columns[pkey] == pkey_value)
-        ).fetchone()
-
-        if not pkey_exists:
-            ins = table.insert().values(**table_data)
-            conn.execute(ins)
-
-
 def all_locodes_and_geometries(session):
     """get shapefile from locode"""
     query = text("""SELECT locode, geometry FROM osm;""")
@@ -1,33 +1,100 @@
 # import EDGAR city data into database
-# >> python citycelloverlapedgar_importer.py --database-uri DB_URI
+# >> python citycelloverlapedgar_importer.py --database_uri DB_URI
 # author: L. Gloege
 # created: 2023-09-28
 
 import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 import os
+from pathlib import Path
+import numpy as np
+import shapely
 from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
 from utils import (
     all_locodes_and_geometries_generator,
     area_of_polygon,
-    create_grid_cell_coords,
-    insert_record,
-    load_wkt,
+    cell_areas,
     uuid_generate_v3,
 )
-from shapely.geometry import Polygon
 import logging
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 
 logger = logging.getLogger(__name__)
-logger.debug('This is a debug message')
 
 # EDGAR grid resolution
 lon_res = 0.1  # degrees
 lat_res = 0.1  # degrees
 
+# cities handed to the workers ahead of the results being written
+PENDING_PER_WORKER = 4
+
+def city_cell_overlaps(locode, boundary_wkt, west, south, east, north):
+    """overlap records of the grid cells intersecting the city boundary
+
+    The candidate cells of the padded bounding box are built as one shapely
+    array and filtered with an STRtree; cells covered by the city have a
+    fraction of 1, only the edge cells are intersected and measured.
+    """
+    boundary = shapely.from_wkt(boundary_wkt)
+    if not shapely.is_valid(boundary):
+        boundary = shapely.make_valid(boundary)
+    shapely.prepare(boundary)
+
+    # add padding to ensure we get edge cells
+    lat_indices = np.arange(
+        round((south - lat_res) / lat_res), round((north + lat_res) / lat_res) + 1
+    )
+    lon_indices = np.arange(
+        round((west - lon_res) / lon_res), round((east + lon_res) / lon_res) + 1
+    )
+    cell_lats, cell_lons = (
+        grid.ravel() for grid in np.meshgrid(lat_indices, lon_indices, indexing="ij")
+    )
+
+    cells = shapely.box(
+        np.round((cell_lons - 0.5) * lon_res, 6),
+        np.round((cell_lats - 0.5) * lat_res, 6),
+        np.round((cell_lons + 0.5) * lon_res, 6),
+        np.round((cell_lats + 0.5) * lat_res, 6),
+    )
+
+    hits = shapely.STRtree(cells).query(boundary, predicate="intersects")
+    cells, cell_lats, cell_lons = cells[hits], cell_lats[hits], cell_lons[hits]
+
+    fractions = np.ones(len(cells))
+    edge = ~shapely.covers(boundary, cells)
+
+    intersections = shapely.intersection(cells[edge], boundary)
+    fractions[edge] = np.array(
+        [area_of_polygon(intersection) for intersection in intersections]
+    ) / cell_areas(cell_lats[edge] * lat_res, lat_res, lon_res)
+
+    created_date = str(datetime.now())
+
+    return [
+        {
+            "id": uuid_generate_v3(f"{locode}_{lat}_{lon}"),
+            "locode": locode,
+            "fraction_in_city": fraction,
+            "cell_lat": lat,
+            "cell_lon": lon,
+            "created_date": created_date,
+        }
+        for lat, lon, fraction in zip(
+            cell_lats.tolist(), cell_lons.tolist(), fractions.tolist()
+        )
+        if fraction > 0
+    ]
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -35,6 +102,18 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
+    parser.add_argument(
+        "--workers",
+        help="processes computing the overlaps (default: number of CPUs)",
+        type=int,
+        default=os.cpu_count(),
+    )
     args = parser.parse_args()
 
     logger.info(f"Connecting to database")
@@ -44,71 +123,35 @@ if __name__ == "__main__":
     session = Session()
 
     table = Table("CityCellOverlapEdgar", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     logger.info(f"Running query")
 
     results_generator = all_locodes_and_geometries_generator(session)
 
-    logger.info(f"Query done")
-
     count = 0
 
-    for row in results_generator:
-        count = count + 1
-        locode, boundary_str, west, south, east, north = row
-        logger.info(f"{count}: Locode: {locode}")
-        boundary_polygon = load_wkt(boundary_str)
-        city_area = area_of_polygon(boundary_polygon)
-        logger.info(f"City area: {city_area}")
-
-        # add padding to ensure we get edge cells
-        bbox_north = north + lat_res
-        bbox_south = south - lat_res
-        bbox_east = east + lon_res
-        bbox_west = west - lon_res
-
-        logger.info(f"Bounding box: {bbox_north, bbox_south, bbox_east, bbox_west}")
-
-        total_intersection_area = 0
-
-        for lat in range(round(bbox_south * 10), round(bbox_north * 10) + 1):
-            for lon in range(round(bbox_west * 10), round(bbox_east * 10) + 1):
-                logger.info(f"Cell: {lat, lon}")
-                coords = create_grid_cell_coords(
-                    lat=lat/10.0,
-                    lon=lon/10.0,
-                    lon_res=lon_res,
-                    lat_res=lat_res
-                )
-                polygon = Polygon(coords)
-                cell = load_wkt(polygon.wkt)
-                intersection_polygon = cell.intersection(boundary_polygon)
-                cell_area = area_of_polygon(cell)
-                intersection_area = area_of_polygon(intersection_polygon)
-
-                logger.info(f"Intersection area: {intersection_area}")
-
-                total_intersection_area = total_intersection_area + intersection_area
-
-                if intersection_area > 0:
-                    fraction_in_city = intersection_area / cell_area
-
-                    logger.info(f"fraction in city: {fraction_in_city}")
-
-                    overlap = {
-                        "id": uuid_generate_v3(f'{locode}_{lat}_{lon}'),
-                        "locode": locode,
-                        "fraction_in_city": fraction_in_city,
-                        "cell_lat": lat,
-                        "cell_lon": lon,
-                        "created_date": str(datetime.now()),
-                    }
-
-                    insert_record(engine, table, "id", overlap)
-
-        logger.info(f"Total intersection area: {total_intersection_area}")
-        logger.info(f"City area percent in intersections: {(total_intersection_area/city_area)*100.0}")
-
-    logger.info(f"Total count: {count}")
+    def write(futures):
+        global count
+        for future in futures:
+            loader.add_many(future.result())
+            count = count + 1
+            if count % 1000 == 0:
+                logger.info(f"{count} cities, {loader.added} overlapping cells")
+
+    # at most PENDING_PER_WORKER cities per worker are in flight, so the
+    # boundaries are not all held in memory at once
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        pending = set()
+        for row in results_generator:
+            pending.add(executor.submit(city_cell_overlaps, *row))
+            if len(pending) >= args.workers * PENDING_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write(done)
+        write(pending)
+
+    loader.flush()
+
+    logger.info(f"Total count: {count}, overlapping cells: {loader.added}")
 
     session.close()
@@ -0,0 +1,72 @@
+# roll up EDGAR emissions per city into CityEmissionsEdgar
+# Note: run this script after citycelloverlapedgar_importer.py and
+# gridcellemissionsedgar_importer.py
+# >> python cityemissionsedgar_importer.py --database_uri DB_URI
+
+import argparse
+import logging
+import os
+from sqlalchemy import create_engine, text
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_city_emissions(conn):
+    """replace the rollup with the current overlap x emissions join
+
+    Runs in the caller's transaction so readers keep seeing the previous
+    totals until the new ones are committed.
+    """
+    conn.execute(text('DELETE FROM "CityEmissionsEdgar";'))
+
+    result = conn.execute(
+        text(
+            """
+            INSERT INTO "CityEmissionsEdgar" (
+                locode,
+                year,
+                reference_number,
+                gas,
+                emissions_quantity,
+                emissions_quantity_units
+            )
+            SELECT
+                cco.locode,
+                gce.year,
+                gce.reference_number,
+                gce.gas,
+                SUM(gce.emissions_quantity * cco.fraction_in_city),
+                MAX(gce.emissions_quantity_units)
+            FROM
+                "CityCellOverlapEdgar" cco
+            JOIN
+                "GridCellEmissionsEdgar" gce
+            ON
+                cco.cell_lat = gce.cell_lat AND cco.cell_lon = gce.cell_lon
+            GROUP BY cco.locode, gce.year, gce.reference_number, gce.gas;
+            """
+        )
+    )
+
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--database_uri",
+        help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
+        default=os.environ.get("DB_URI"),
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_uri)
+
+    logger.info("Refreshing CityEmissionsEdgar")
+
+    with engine.begin() as conn:
+        count = refresh_city_emissions(conn)
+
+    logger.info(f"Rows written: {count}")
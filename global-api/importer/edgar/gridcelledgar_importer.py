@@ -7,17 +7,22 @@
 import argparse
 from datetime import datetime
 import os
+from pathlib import Path
 from shapely.geometry import Polygon
 from sqlalchemy import create_engine, MetaData, Table
+import sys
 from tqdm import tqdm
 from utils import (
     area_of_polygon,
     create_grid_cell_coords,
     get_edgar,
-    insert_record,
     uuid_generate_v3,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+
 # EDGAR grid resolution
 lat_res = 0.1  # degrees
 lon_res = 0.1  # degrees
@@ -29,6 +34,12 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     # load any file, just want the grid
@@ -38,6 +49,7 @@ if __name__ == "__main__":
     metadata_obj = MetaData()
 
     table = Table("GridCellEdgar", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     lats = ds.lat.values
     lons = ds.lon.values
@@ -62,4 +74,6 @@ if __name__ == "__main__":
                 "created_date": str(datetime.now()),
             }
 
-            insert_record(engine, table, "id", record)
+            loader.add(record)
+
+    loader.flush()
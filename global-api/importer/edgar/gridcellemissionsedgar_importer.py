@@ -7,16 +7,21 @@ import argparse
 from datetime import datetime
 import os
 import pandas as pd
+from pathlib import Path
 from sqlalchemy import create_engine, MetaData, Table
 from sqlalchemy.orm import sessionmaker
+import sys
 from utils import (
     get_edgar,
-    insert_record,
     seconds_in_year,
-    uuid_generate_v3,
-    area_of_cell,
+    cell_areas,
 )
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common.bulk_loader import DEFAULT_BATCH_SIZE, BulkLoader  # noqa: E402
+from common.uuids import uuid_column  # noqa: E402
+
 # EDGAR grid resolution
 lon_res = 0.1  # degrees
 lat_res = 0.1  # degrees
@@ -28,6 +33,12 @@ if __name__ == "__main__":
         help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
         default=os.environ.get("DB_URI"),
     )
+    parser.add_argument(
+        "--batch_size",
+        help="records written per COPY/INSERT batch (default: %(default)s)",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+    )
     args = parser.parse_args()
 
     engine = create_engine(args.database_uri)
@@ -36,6 +47,7 @@ if __name__ == "__main__":
     session = Session()
 
     table = Table("GridCellEmissionsEdgar", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, table, "id", args.batch_size)
 
     get_gpc_refno = {
         "IND": "I.3.1",
@@ -73,7 +85,8 @@ if __name__ == "__main__":
                     .rename(columns={"lat": "lat_center", "lon": "lon_center"})
                 )
 
-                df_filt['area'] = df_filt.apply(lambda row: area_of_cell(row['lat_center'], row['lon_center'], lat_res, lon_res), axis=1)
+                # one geodesic area per latitude row, broadcast to its cells
+                df_filt["area"] = cell_areas(df_filt["lat_center"].to_numpy(), lat_res, lon_res)
 
                 df_final = (
                     df_filt
@@ -89,11 +102,10 @@ if __name__ == "__main__":
                     .assign(cell_lat=lambda row: round(row["lat_center"] * 10))
                     .assign(cell_lon=lambda row: round(row["lon_center"] * 10))
                     .assign(
-                        id=lambda x: x.apply(
-                            lambda row: uuid_generate_v3(
-                                f"edgar{str(row['cell_lat'])}{str(row['cell_lon'])}{row['year']}{row['gas']}{row['reference_number']}"
-                            ),
-                            axis=1,
+                        id=lambda x: uuid_column(
+                            x,
+                            ["cell_lat", "cell_lon", "year", "gas", "reference_number"],
+                            prefix="edgar",
                         )
                     )
                     .assign(created_date=str(datetime.now()))
@@ -112,7 +124,7 @@ if __name__ == "__main__":
                     record for record in df_final.to_dict(orient="records")
                 )
 
-                for record in record_generator:
-                    insert_record(engine, table, "id", record)
+                loader.add_many(record_generator)
 
+    loader.flush()
     session.close()
@@ -11,3 +11,4 @@ fi
 $python_cmd gridcelledgar_importer.py --database_uri $DB_URI
 $python_cmd citycelloverlapedgar_importer.py --database_uri $DB_URI
 $python_cmd gridcellemissionsedgar_importer.py --database_uri $DB_URI
+$python_cmd cityemissionsedgar_importer.py --database_uri $DB_URI
@@ -5,6 +5,7 @@
 import csv
 import calendar
 from decimal import Decimal, getcontext
+from functools import lru_cache
 import fsspec
 import geopandas as gpd
 import json
@@ -27,6 +28,9 @@ from xarray import DataArray
 import zipfile
 import geojson
 
+# WGS84 ellipsoid for the geodesic areas; one instance shared by every call
+geod = Geod(ellps="WGS84")
+
 def write_dic_to_csv(output_dir, name, dic) -> None:
     """writes dictionary to a csv
 
@@ -178,7 +182,6 @@ def area_of_polygon(polygon):
     polygon = Polygon(coords)
     area = area_of_polygon(polygon)
     """
-    geod = Geod(ellps="WGS84")
     area, _ = geod.geometry_area_perimeter(polygon)
     return abs(area)
 
@@ -421,24 +424,6 @@ def get_edgar(sector, gas, year):
         return None
 
 
-def insert_record(engine, table, pkey, record):
-    """insert record into table"""
-    fields = [col.name for col in table.columns]
-
-    table_data = {key: record.get(key) for key in record.keys() if key in fields}
-
-    pkey_value = table_data.get(pkey)
-
-    with engine.begin() as conn:
-        pkey_exists = conn.execute(
-            table.select().where(table.columns[pkey] == pkey_value)
-        ).fetchone()
-
-        if not pkey_exists:
-            ins = table.insert().values(**table_data)
-            conn.execute(ins)
-
-
 def all_locodes_and_geometries(session):
     """get shapefile from locode"""
     query = text("""SELECT locode, geometry FROM osm ORDER BY locode;""")
@@ -564,13 +549,46 @@ def get_edgar_grid_coords_and_wkt(session):
 
     return session.execute(query).fetchall()
 
+@lru_cache(maxsize=None)
+def cell_area(lat: float, lat_res: float, lon_res: float):
+    """area in square meters of a grid cell centered on latitude `lat`
+
+    On a regular lat/lon grid the area depends only on the latitude, so it
+    is computed once per latitude row and resolution and cached.
+    """
+    polygon = Polygon(
+        create_grid_cell_coords(lat=lat, lon=0, lon_res=lon_res, lat_res=lat_res)
+    )
+    return area_of_polygon(polygon)
+
+
+def cell_areas(lats, lat_res: float, lon_res: float):
+    """areas in square meters of the grid cells centered on `lats`
+
+    parameters
+    ----------
+    lats: array-like
+        latitudes of the grid cell centroids in degrees, any shape
+
+    lat_res, lon_res: float
+        grid resolution in degrees
+
+    returns
+    --------
+    areas: numpy.ndarray
+        area of each cell, same shape as `lats`; one geodesic area is
+        computed per distinct latitude and broadcast to its cells
+
+    example
+    --------
+    areas = cell_areas(df["lat_center"].to_numpy(), 0.1, 0.1)
+    """
+    lats = np.round(np.asarray(lats, dtype=float), 6)
+    rows, inverse = np.unique(lats, return_inverse=True)
+    row_areas = np.array([cell_area(lat, lat_res, lon_res) for lat in rows.tolist()])
+    return row_areas[inverse].reshape(lats.shape)
+
+
 def area_of_cell(lat: float, lon: float, lon_res: float, lat_res: float):
-    coords = create_grid_cell_coords(
-                    lat=lat,
-                    lon=lon,
-                    lon_res=lon_res,
-                    lat_res=lat_res
-                )
-    polygon = Polygon(coords)
-    cell = load_wkt(polygon.wkt)
-    return area_of_polygon(cell)
\ No newline at end of file
+    """area of the grid cell centered on (lat, lon); see cell_area"""
+    return cell_area(round(float(lat), 6), lat_res, lon_res)
\ No newline at end of file
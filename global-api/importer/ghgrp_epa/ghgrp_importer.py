@@ -54,15 +54,21 @@ years_to_files = {
     "2022": ["2022_data_summary_spreadsheets/ghgp_data_2022.xlsx"],
 }
 
-def lat_lon_to_locode(apibase, lat, lon):
-    r = requests.get(f"{apibase}/api/v0/cityboundary/locode/{lat}/{lon}")
-    r.raise_for_status()
-    json = r.json()
-    locodes = json["locodes"]
-    if len(locodes) == 0:
-        return None
-    else:
-        return locodes[0]
+def lat_lon_to_locodes(apibase, coordinates, chunk_size=1000):
+    """first locode containing each (lat, lon), or None; the points are sent
+    to the bulk endpoint `chunk_size` at a time instead of one request each"""
+    locodes = []
+    for start in range(0, len(coordinates), chunk_size):
+        chunk = coordinates[start:start + chunk_size]
+        r = requests.post(
+            f"{apibase}/api/v0/cityboundary/locode",
+            json={"points": [{"lat": lat, "lon": lon} for lat, lon in chunk]},
+        )
+        r.raise_for_status()
+        json = r.json()
+        for matches in json["locodes"]:
+            locodes.append(matches[0] if len(matches) > 0 else None)
+    return locodes
 
 def load_direct_emitters_from_zip(zip_file_path: str, file_name: str):
     """Load 'Direct Emitters' sheet from a specific XLSX file inside a zip archive into a pandas DataFrame"""
@@ -82,6 +88,12 @@ if __name__ == "__main__":
     )
     parser.add_argument("--output", help="CSV file to write to")
     parser.add_argument("--apibase", help="API base URL", default="https://ccglobal.openearth.dev")
+    parser.add_argument(
+        "--chunk_size",
+        help="number of facilities per locode lookup request",
+        type=int,
+        default=1000,
+    )
 
     args = parser.parse_args()
 
@@ -146,17 +158,18 @@ if __name__ == "__main__":
                             else:
                                 continue
 
+                # get the locodes of all the facilities, in chunks
+                coordinates = list(zip(df['latitude'], df['longitude']))
+                locodes = lat_lon_to_locodes(args.apibase, coordinates, args.chunk_size)
+
                 # insertion process
-                for index, row in df.iterrows():
+                for (index, row), locode in zip(df.iterrows(), locodes):
 
                     record = row.to_dict()
 
                     # metric tonnes to kg
                     record['emissions_quantity'] = record['emissions_quantity']*1000
 
-                    # get the locode and coordinate points
-                    locode = lat_lon_to_locode(args.apibase, record['latitude'], record['longitude'])
-
                     if not locode:
                         logging.warning(f"Could not find locode for facility {record['facility_id']}")
                         continue
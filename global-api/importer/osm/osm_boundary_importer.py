@@ -0,0 +1,112 @@
+# precompute the GeoJSON and simplified city boundaries served by
+# /api/v0/cityboundary/city/{locode}?format=...&tolerance=...
+# Note: osm_importer.py runs this after loading the polygons
+# >> python osm_boundary_importer.py --database_uri DB_URI
+
+import argparse
+import logging
+import os
+import shapely
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+# simplification tolerances (degrees) to precompute; 0 is the full geometry
+# Note: the API accepts only these (BOUNDARY_TOLERANCES in routes/city_boundaries_endpoint.py)
+TOLERANCES = [0.0, 0.0001, 0.001, 0.01]
+
+# number of polygons converted at a time
+CHUNK_SIZE = 500
+
+
+def boundary_records(rows, tolerances=TOLERANCES):
+    """WKT and GeoJSON of each (locode, geometry) row at each tolerance"""
+    locodes = [row.locode for row in rows]
+    wkts = [row.geometry for row in rows]
+    geometries = shapely.from_wkt(wkts, on_invalid="ignore")
+
+    records = []
+    for tolerance in tolerances:
+        if tolerance == 0:
+            simplified = geometries
+            simplified_wkts = wkts
+        else:
+            simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+            simplified_wkts = shapely.to_wkt(simplified)
+        geojsons = shapely.to_geojson(simplified)
+
+        for locode, geometry, wkt, geojson in zip(
+            locodes, geometries, simplified_wkts, geojsons
+        ):
+            if geometry is None:
+                continue
+            records.append(
+                {
+                    "locode": locode,
+                    "tolerance": tolerance,
+                    "geometry": wkt,
+                    "geojson": geojson,
+                }
+            )
+
+    return records
+
+
+def refresh_boundaries(engine, tolerances=TOLERANCES, chunk_size=CHUNK_SIZE):
+    """replace osm_boundary with the variants of the current osm polygons
+
+    The rows are written in a single transaction so the API keeps serving
+    the previous boundaries until the new ones are committed.
+    """
+    count = 0
+
+    with engine.connect() as reader, engine.begin() as writer:
+        writer.execute(text("DELETE FROM osm_boundary;"))
+
+        result = reader.execution_options(stream_results=True, yield_per=chunk_size).execute(
+            text("SELECT locode, geometry FROM osm WHERE geometry IS NOT NULL;")
+        )
+
+        for rows in result.partitions():
+            records = boundary_records(rows, tolerances)
+            if records:
+                writer.execute(
+                    text(
+                        """
+                        INSERT INTO osm_boundary (locode, tolerance, geometry, geojson)
+                        VALUES (:locode, :tolerance, :geometry, :geojson);
+                        """
+                    ),
+                    records,
+                )
+            count += len(records)
+            logger.info(f"Boundaries written: {count}")
+
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--database_uri",
+        help="database URI (e.g. postgresql://ccglobal:@localhost/ccglobal)",
+        default=os.environ.get("DB_URI"),
+    )
+    parser.add_argument(
+        "--tolerances",
+        help="simplification tolerances in degrees (default: %(default)s)",
+        type=float,
+        nargs="+",
+        default=TOLERANCES,
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    engine = create_engine(args.database_uri)
+
+    logger.info("Refreshing osm_boundary")
+
+    count = refresh_boundaries(engine, args.tolerances)
+
+    logger.info(f"Rows written: {count}")
@@ -10,17 +10,51 @@ import logging
 import os
 import pandas as pd
 from pathlib import Path
-from sqlalchemy import create_engine, insert, MetaData, Table
+from sqlalchemy import create_engine, Integer, MetaData, Table
+import sys
+from osm_boundary_importer import refresh_boundaries
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-def record_generator(fl: str, compression: str = "infer"):
-    """returns a generator for the csv file
+from common.bulk_loader import BulkLoader  # noqa: E402
+
+# rows read, and written, at a time; the polygons are large so this bounds
+# the memory of the import rather than the size of the file
+CHUNK_SIZE = 1_000
+
+
+def chunk_generator(
+    fl: str, chunk_size: int = CHUNK_SIZE, compression: str = "infer", dtype=None
+):
+    """returns a generator of DataFrames of chunk_size rows of the csv file,
+    streamed from a path or URL without reading the whole file
     Note: I was getting the following error using csv.DictReader
     Error: field larger than field limit (131072)
     """
-    df = pd.read_csv(fl, compression=compression)
-    for _, row in df.iterrows():
-        yield row.to_dict()
+    with pd.read_csv(
+        fl, compression=compression, chunksize=chunk_size, dtype=dtype
+    ) as reader:
+        yield from reader
+
+
+def import_csv(loader: BulkLoader, fl: str, compression: str = "infer") -> int:
+    """write the rows of a csv file a chunk at a time; returns the rows read
+
+    Empty values are NULL and locodes already in the table are kept.
+    """
+    # integer columns stay integers in the chunks with missing values
+    dtype = {
+        col.name: "Int64" for col in loader.table.columns if isinstance(col.type, Integer)
+    }
+
+    row_counter = 0
+    for chunk in chunk_generator(fl, loader.batch_size, compression, dtype):
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        loader.add_many(chunk.to_dict(orient="records"))
+        written = loader.flush()
+        row_counter += len(chunk)
+        logging.info(f"{fl}: {row_counter} rows read, {written} new in the last chunk")
+    return row_counter
 
 
 if __name__ == "__main__":
@@ -42,6 +76,12 @@ if __name__ == "__main__":
         help="url to import",
         default='https://ipfs.io/ipfs/bafybeiajpp2sbogwvfjojz5knyt6en32ia7rsuuyrjxuf4ln4urhwbhumm/osm_data_updated.csv.gz',
     )
+    parser.add_argument(
+        "--chunk_size",
+        help="rows read and written at a time (default: %(default)s)",
+        type=int,
+        default=CHUNK_SIZE,
+    )
     parser.add_argument(
         "--log_file", help="path to log file", default="./osm_importer.log"
     )
@@ -53,97 +93,30 @@ if __name__ == "__main__":
         format="%(asctime)s - %(levelname)s - %(message)s",
     )
 
-    engine = create_engine(args.database_uri)
-    metadata_obj = MetaData()
-
-    osm = Table("osm", metadata_obj, autoload_with=engine)
-    fields = [col.name for col in osm.columns]
-
     if args.file and args.dir:
-        print("Error: --file and --dir can not be set at same time")
-    elif args.file:
-        file = Path(args.file).absolute()
-
-        generator = record_generator(file)
-
-        record_counter = 0
-        for record in generator:
-            record_counter += 1
-            logging.info(f"Processing row num: {record_counter} in file: {file} ")
-
-            record = {key: value for key, value in record.items() if value != ""}
-
-            table_data = {
-                key: record.get(key) for key in record.keys() if key in fields
-            }
-
-            primary_key_value = table_data.get("locode")
-
-            with engine.begin() as conn:
-                primary_key_exists = conn.execute(
-                    osm.select().where(osm.c.locode == primary_key_value)
-                ).fetchone()
-
-                if not primary_key_exists:
-                    ins = osm.insert().values(**table_data)
-                    conn.execute(ins)
+        parser.error("--file and --dir can not be set at same time")
 
+    if args.file:
+        sources = [(Path(args.file).absolute(), "infer")]
     elif args.dir:
-        files = Path(args.dir).glob("*.csv")
-
-        for file in files:
-            generator = record_generator(file)
-
-            record_counter = 0
-            for record in generator:
-                record_counter += 1
-                logging.info(f"Processing row num: {record_counter} in file: {file} ")
-
-                record = {key: value for key, value in record.items() if value != ""}
-
-                table_data = {
-                    key: record.get(key) for key in record.keys() if key in fields
-                }
-
-            primary_key_value = table_data.get("locode")
+        sources = [(file, "infer") for file in sorted(Path(args.dir).glob("*.csv"))]
+    else:
+        sources = [(args.url, "gzip")]
 
-            with engine.begin() as conn:
-                primary_key_exists = conn.execute(
-                    osm.select().where(osm.c.locode == primary_key_value)
-                ).fetchone()
-
-                if not primary_key_exists:
-                    ins = osm.insert().values(**table_data)
-                    conn.execute(ins)
-    elif args.url:
-        file = args.url
-
-        logging.info(
-            f"Reading data from: {file} (may take about 30 seconds to read the data)"
-        )
-
-        generator = record_generator(file, compression="gzip")
-
-        record_counter = 0
-        for record in generator:
-            record_counter += 1
-            logging.info(f"Processing row num: {record_counter} in file: {file} ")
-
-            record = {key: value for key, value in record.items() if value != ""}
+    engine = create_engine(args.database_uri)
+    metadata_obj = MetaData()
 
-            table_data = {
-                key: record.get(key) for key in record.keys() if key in fields
-            }
+    osm = Table("osm", metadata_obj, autoload_with=engine)
+    loader = BulkLoader(engine, osm, "locode", args.chunk_size)
 
-            primary_key_value = table_data.get("locode")
+    for file, compression in sources:
+        logging.info(f"Reading data from: {file}")
+        rows = import_csv(loader, file, compression)
+        logging.info(f"Rows read from {file}: {rows}")
 
-            with engine.begin() as conn:
-                primary_key_exists = conn.execute(
-                    osm.select().where(osm.c.locode == primary_key_value)
-                ).fetchone()
+    logging.info(f"Rows read: {loader.added}, new boundaries: {loader.written}")
 
-                if not primary_key_exists:
-                    ins = osm.insert().values(**table_data)
-                    conn.execute(ins)
+    logging.info("Precomputing the GeoJSON and simplified boundaries")
+    refresh_boundaries(engine)
 
     logging.info(f"Done!")
@@ -1,11 +1,14 @@
 import logging
-import uvicorn
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
+from brotli_asgi import BrotliMiddleware
 
 from settings import settings
-from utils.helpers import get_or_create_log_file
+from db.database import async_engine, engine
+from utils.helpers import get_or_create_log_file, start_queue_logging
+from utils.etag import conditional_request_middleware
+from utils.metrics import instrument_engine, route_context_middleware
 from routes.health import api_router as health_check_route
 from routes.city_locode_endpoint import api_router as city_locode_route
 from routes.city_boundaries_endpoint import api_router as city_boundaries_route
@@ -16,34 +19,65 @@ from routes.catalogue_last_update_endpoint import api_router as catalogue_last_u
 from routes.city_locode_endpoint_ghgrp import api_router as ghgrp_city_locode_route
 from routes.country_code_endpoint import api_router as country_code_endpoint_route
 from routes.citywide_emission_endpoint import api_router as citywide_route
+from routes.cache_endpoint import api_router as cache_route
+from routes.batch_endpoint import api_router as batch_route
+from routes.city_inventory_endpoint import api_router as city_inventory_route
+from routes.metrics_endpoint import api_router as metrics_route
 
 """
-Logger instance initialized and configured
-    - filename  Name of the file where all the logs will be stored.
-    - encoding  If specified together with a filename, this encoding is passed to
-                the created FileHandler, causing it to be used when the file is opened.
+Logger instance initialized and configured; records are queued and written
+to the file by a listener thread, so logging never blocks a request
+    - file_path  Name of the file where all the logs will be stored.
     - level     Set the root logger level to the specified level.
     - format    Use the specified format string for the handler.
     - datefmt   Use the specified date/time format.
 """
 
-logging.basicConfig(
-    filename=get_or_create_log_file("logs/api.log"),
-    encoding="utf-8",
-    level=logging.DEBUG,
+log_listener = start_queue_logging(
+    file_path=get_or_create_log_file("logs/api.log"),
+    level=settings.LOG_LEVEL,
     format="%(asctime)s:%(levelname)s:%(pathname)s:%(message)s",
     datefmt=("%Y-%m-%d %H:%M:%S"),
 )
 logger = logging.getLogger(__name__)
 
+"""
+Per-route query latency histograms, served on /metrics
+"""
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 
 """
 FastApi application instance intialized with `title` and `debug mode`
 """
-app = FastAPI(title=settings.PROJECT_NAME, debug=True)
+app = FastAPI(title=settings.PROJECT_NAME, debug=settings.DEBUG)
 
 """
-Middleware to allow CORS for all routes, methods and origins
+Middleware to compress large responses (e.g. city boundaries) with brotli,
+or gzip for clients that do not accept brotli
+"""
+app.add_middleware(
+    BrotliMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_fallback=True,
+)
+
+"""
+Middleware to answer conditional requests (If-None-Match) with 304 while
+the datasource catalogue has not been updated
+"""
+app.middleware("http")(conditional_request_middleware)
+
+"""
+Middleware to label the database queries with the route being served
+"""
+app.middleware("http")(route_context_middleware)
+
+"""
+Middleware to allow CORS for all routes, methods and origins; added last so
+it is the outermost layer and the 304s and errors of the other middlewares
+carry its headers too
 """
 app.add_middleware(
     CORSMiddleware,
@@ -135,11 +169,40 @@ app.include_router(
     tags=["Citywide emissions"],
 )
 
+app.include_router(
+    city_inventory_route,
+    tags=["City inventory"],
+)
+
+app.include_router(
+    batch_route,
+    tags=["Batch emissions"],
+)
+
+app.include_router(
+    metrics_route,
+    tags=["Metrics"],
+)
+
+app.include_router(
+    cache_route,
+    tags=["Cache"],
+)
+
+@app.on_event("shutdown")
+def stop_log_listener():
+    log_listener.stop()
+
+
 """
-Entry point of the fastapi application (Drive Code)
+Entry point of the fastapi application for development (Drive Code)
     - change the port number if port is already occupied
     - modify the logging level according to the need
+In production, run several worker processes with
+    gunicorn -c gunicorn.conf.py main:app
 """
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("main:app", host="0.0.0.0", port=8000, log_level="debug", reload=True)
\ No newline at end of file
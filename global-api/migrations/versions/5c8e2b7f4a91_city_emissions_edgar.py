@@ -0,0 +1,42 @@
+"""city emissions edgar
+
+Revision ID: 5c8e2b7f4a91
+Revises: a3f1c27d9b04
+Create Date: 2026-10-18 10:03:17.552930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import text
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c8e2b7f4a91"
+down_revision: Union[str, None] = "a3f1c27d9b04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "CityEmissionsEdgar",
+        sa.Column("locode", sa.String, nullable=False),
+        sa.Column("year", sa.Integer, nullable=False),
+        sa.Column("reference_number", sa.String, nullable=False),
+        sa.Column("gas", sa.String, nullable=False),
+        sa.Column("emissions_quantity", sa.Float, nullable=False),
+        sa.Column("emissions_quantity_units", sa.String, nullable=True),
+        sa.Column(
+            "created_date", sa.DateTime(), server_default=text("CURRENT_TIMESTAMP")
+        ),
+        sa.Column(
+            "modified_date", sa.DateTime(), server_default=text("CURRENT_TIMESTAMP")
+        ),
+        sa.PrimaryKeyConstraint("locode", "year", "reference_number", "gas"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("CityEmissionsEdgar")
@@ -0,0 +1,33 @@
+"""osm boundary
+
+Revision ID: 7d2e9c41b8a3
+Revises: 5c8e2b7f4a91
+Create Date: 2026-10-18 14:21:06.184402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2e9c41b8a3"
+down_revision: Union[str, None] = "5c8e2b7f4a91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "osm_boundary",
+        sa.Column("locode", sa.String, nullable=False),
+        sa.Column("tolerance", sa.Float, nullable=False),
+        sa.Column("geometry", sa.Text, nullable=False),
+        sa.Column("geojson", sa.Text, nullable=False),
+        sa.PrimaryKeyConstraint("locode", "tolerance"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("osm_boundary")
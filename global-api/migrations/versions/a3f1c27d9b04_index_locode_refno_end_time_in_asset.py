@@ -0,0 +1,33 @@
+"""index locode, reference_number and end_time in asset
+
+Revision ID: a3f1c27d9b04
+Revises: 583858ff1aa8
+Create Date: 2026-10-18 09:12:41.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f1c27d9b04"
+down_revision: Union[str, None] = "583858ff1aa8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_asset_locode_reference_number_end_time"),
+        "asset",
+        ["locode", "reference_number", "end_time"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_asset_locode_reference_number_end_time"), table_name="asset"
+    )
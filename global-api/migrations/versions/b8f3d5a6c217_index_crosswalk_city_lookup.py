@@ -0,0 +1,48 @@
+"""index the crosswalk city lookup
+
+Revision ID: b8f3d5a6c217
+Revises: 7d2e9c41b8a3
+Create Date: 2026-10-18 15:02:44.371958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8f3d5a6c217"
+down_revision: Union[str, None] = "7d2e9c41b8a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # cells of a city, with the fraction, without visiting the heap
+    op.create_index(
+        op.f("ix_crosswalk_CityGridOverlap_locode_cell_id"),
+        "crosswalk_CityGridOverlap",
+        ["locode", "cell_id"],
+        unique=False,
+        postgresql_include=["fraction_in_city"],
+    )
+    # emissions of a cell for a sector and year
+    op.create_index(
+        op.f("ix_crosswalk_GridCellEmissions_cell_id_reference_number_year"),
+        "crosswalk_GridCellEmissions",
+        ["cell_id", "reference_number", "year"],
+        unique=False,
+        postgresql_include=["gas", "emissions_quantity"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_crosswalk_GridCellEmissions_cell_id_reference_number_year"),
+        table_name="crosswalk_GridCellEmissions",
+    )
+    op.drop_index(
+        op.f("ix_crosswalk_CityGridOverlap_locode_cell_id"),
+        table_name="crosswalk_CityGridOverlap",
+    )
@@ -0,0 +1,58 @@
+"""index the country_code and citywide_emissions lookups
+
+Revision ID: e5a9c3d17f42
+Revises: b8f3d5a6c217
+Create Date: 2026-10-18 18:21:07.519384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a9c3d17f42"
+down_revision: Union[str, None] = "b8f3d5a6c217"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # gases of a country and year, for one or every source and sector,
+    # without visiting the heap
+    op.create_index(
+        op.f("ix_country_code_country_code_year_source_name_GPC_refno"),
+        "country_code",
+        ["country_code", "year", "source_name", "GPC_refno"],
+        unique=False,
+        postgresql_include=["gas_name", "emissions_value"],
+    )
+    # same for a city, with the columns of the emissions details
+    op.create_index(
+        op.f("ix_citywide_emissions_locode_year_source_name_GPC_refno"),
+        "citywide_emissions",
+        ["locode", "year", "source_name", "GPC_refno"],
+        unique=False,
+        postgresql_include=[
+            "gas_name",
+            "emissions_value",
+            "temporal_granularity",
+            "activity_name",
+            "activity_value",
+            "activity_units",
+            "emission_factor_value",
+            "emission_factor_units",
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_citywide_emissions_locode_year_source_name_GPC_refno"),
+        table_name="citywide_emissions",
+    )
+    op.drop_index(
+        op.f("ix_country_code_country_code_year_source_name_GPC_refno"),
+        table_name="country_code",
+    )
@@ -24,3 +24,14 @@ class Osm(Base):
     addresstype = Column(String)
     name = Column(String)
     display_name = Column(String)
+
+
+class OsmBoundary(Base):
+    """city boundary precomputed at OSM import time, as WKT and GeoJSON,
+    simplified by `tolerance` degrees (0 for the full geometry)"""
+    __tablename__ = 'osm_boundary'
+
+    locode = Column(String, primary_key=True)
+    tolerance = Column(Float, primary_key=True)
+    geometry = Column(Text)
+    geojson = Column(Text)
@@ -0,0 +1,83 @@
+import asyncio
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from typing import List
+from routes import (
+    city_locode_endpoint,
+    city_locode_endpoint_crosswalk,
+    city_locode_endpoint_edgar,
+    city_locode_endpoint_ghgrp,
+    citywide_emission_endpoint,
+)
+from utils.emissions import DEFAULT_GWP, GwpReport
+
+api_router = APIRouter(prefix="/api/v0")
+
+MAX_BATCH_SIZE = 500
+
+# sources with their own tables; every other source name is read from citywide_emissions
+batch_sources = {
+    "climatetrace": city_locode_endpoint.batch_totals,
+    "crosswalk": city_locode_endpoint_crosswalk.batch_totals,
+    "edgar": city_locode_endpoint_edgar.batch_totals,
+    "ghgrp_epa": city_locode_endpoint_ghgrp.batch_totals,
+}
+
+
+class EmissionsQuery(BaseModel):
+    source: str
+    locode: str
+    year: int
+    gpcReferenceNumber: str
+
+
+class BatchRequest(BaseModel):
+    queries: List[EmissionsQuery] = Field(..., max_length=MAX_BATCH_SIZE)
+    gwp: GwpReport = DEFAULT_GWP
+
+
+async def source_totals(source, keys, gwp=DEFAULT_GWP):
+    """totals payload per (locode, year, gpcReferenceNumber) key for one source"""
+    if source in batch_sources:
+        return await batch_sources[source](keys, gwp)
+    return await citywide_emission_endpoint.batch_totals(source, keys, gwp)
+
+
+@api_router.post("/emissions/batch")
+async def get_emissions_batch(request: BatchRequest):
+    """Totals for many city/year/sector combinations in one set-based query per source.
+
+    Results are returned in request order; combinations without data carry
+    a 404 status instead of failing the whole batch."""
+
+    keys_by_source = {}
+    for query in request.queries:
+        key = (query.locode, query.year, query.gpcReferenceNumber)
+        keys_by_source.setdefault(query.source, {})[key] = None
+
+    # the sources are independent, so their queries run concurrently
+    sources = list(keys_by_source)
+    totals = dict(
+        zip(
+            sources,
+            await asyncio.gather(
+                *(
+                    source_totals(source, list(keys_by_source[source]), request.gwp)
+                    for source in sources
+                )
+            ),
+        )
+    )
+
+    results = []
+    for query in request.queries:
+        key = (query.locode, query.year, query.gpcReferenceNumber)
+        result = query.model_dump()
+        data = totals[query.source].get(key)
+        if data is None:
+            result.update(status=404, detail="No data available")
+        else:
+            result.update(status=200, data=data)
+        results.append(result)
+
+    return {"results": results}
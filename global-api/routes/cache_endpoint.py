@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from utils.cache import response_cache
+
+api_router = APIRouter(prefix="/api/v0")
+
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """hit/miss counters of the shared emissions response cache"""
+    return response_cache.stats()
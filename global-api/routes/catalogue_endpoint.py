@@ -1,35 +1,140 @@
 from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import JSONResponse, PlainTextResponse
-from db.database import SessionLocal
+from sqlalchemy import select
+from db.database import AsyncSessionLocal
 from models.datasource import Datasource
+from settings import settings
 from typing import Optional
+from utils.cache import TTLCache, data_version
+import asyncio
 import csv
 import io
+import json
 
 api_router = APIRouter(prefix="/api/v0")
 
+CATALOGUE_FIELDS = [column.name for column in Datasource.__table__.columns]
+
+# the catalogue as column lists, reloaded when the last-update changes
+_catalogue = {"version": None, "columns": None}
+_catalogue_lock = asyncio.Lock()
+
+# rendered JSON/CSV bodies by version, format, fields and filters
+_renders = TTLCache(maxsize=256, ttl=settings.CACHE_TTL)
+
+
+def split_values(value):
+    """comma-separated query parameter as a tuple, empty when not given"""
+    if not value:
+        return ()
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+async def db_query():
+    async with AsyncSessionLocal() as session:
+        query = select(*Datasource.__table__.columns).order_by(
+            Datasource.gpc_reference_number.desc()
+        )
+        result = (await session.execute(query)).fetchall()
+
+    return result
+
+
+async def catalogue_columns():
+    """the catalogue as a dict of column lists, read once per last-update"""
+    version = await data_version()
+
+    async with _catalogue_lock:
+        if _catalogue["columns"] is None or _catalogue["version"] != version:
+            records = await db_query()
+            _catalogue["columns"] = {
+                name: [getattr(record, name) for record in records]
+                for name in CATALOGUE_FIELDS
+            }
+            _catalogue["version"] = version
+            _renders.clear()
+
+        return version, _catalogue["columns"]
+
+
+def selected_rows(columns, gpc_reference_numbers, retrieval_methods):
+    """indexes of the datasources matching the filters"""
+    rows = range(len(columns["datasource_id"]))
+
+    if gpc_reference_numbers:
+        values = columns["gpc_reference_number"]
+        rows = [i for i in rows if values[i] in gpc_reference_numbers]
+
+    if retrieval_methods:
+        values = columns["retrieval_method"]
+        rows = [i for i in rows if values[i] in retrieval_methods]
+
+    return list(rows)
+
+
+def render_json(columns, names, rows):
+    """same body as returning {"datasources": [...]} from the route"""
+    datasources = [{name: columns[name][i] for name in names} for i in rows]
+
+    return json.dumps(
+        {"datasources": datasources},
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=lambda value: value.isoformat(),
+    ).encode("utf-8")
+
+
+def render_csv(columns, names, rows):
+    output = io.StringIO()
+    csvwriter = csv.writer(output)
+    csvwriter.writerow(names)
+    for i in rows:
+        csvwriter.writerow([columns[name][i] for name in names])
+    return output.getvalue().encode("utf-8")
+
 
 @api_router.get("/catalogue")
-def get_datasources(format: Optional[str] = None):
+async def get_datasources(
+    format: Optional[str] = None,
+    fields: Optional[str] = None,
+    gpc_reference_number: Optional[str] = None,
+    retrieval_method: Optional[str] = None,
+):
+    """The datasource catalogue as JSON or CSV (`format=csv`).
+
+    `fields` projects the columns and `gpc_reference_number` /
+    `retrieval_method` filter the datasources; each takes a comma-separated
+    list. Renders are kept in memory until the catalogue is updated."""
+
+    names = split_values(fields) or tuple(CATALOGUE_FIELDS)
+
+    unknown = [name for name in names if name not in CATALOGUE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    gpc_reference_numbers = split_values(gpc_reference_number)
+    retrieval_methods = split_values(retrieval_method)
+    as_csv = format == "csv"
+
+    version, columns = await catalogue_columns()
+
+    key = (version, as_csv, names, gpc_reference_numbers, retrieval_methods)
+    hit, content = _renders.get(key)
 
-    records = None
+    if not hit:
+        rows = selected_rows(columns, gpc_reference_numbers, retrieval_methods)
 
-    with SessionLocal() as session:
-        query = session.query(Datasource).order_by(Datasource.gpc_reference_number.desc())
-        records = query.all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="No data available")
 
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
+        if as_csv:
+            content = render_csv(columns, names, rows)
+        else:
+            content = render_json(columns, names, rows)
 
-    if format == "csv":
-        output = io.StringIO()
-        csvwriter = csv.writer(output)
-        names = [column.name for column in Datasource.__table__.columns]
-        csvwriter.writerow(names)
-        for datasource in records:
-            csvwriter.writerow([getattr(datasource, name) for name in names])
-        response = PlainTextResponse(content=output.getvalue(), media_type="text/csv")
-    else:
-        response = {"datasources": records}
+        _renders.set(key, content)
 
-    return response
+    return Response(
+        content=content, media_type="text/csv" if as_csv else "application/json"
+    )
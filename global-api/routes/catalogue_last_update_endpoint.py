@@ -1,13 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
-import pandas as pd
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal
 
 api_router = APIRouter(prefix="/api/v0")
 
 
-def db_query():
-    with SessionLocal() as session:
+async def db_query():
+    async with AsyncSessionLocal() as session:
         query = text(
             """
             SELECT DISTINCT ROUND(EXTRACT(EPOCH FROM MAX(modified_date)))
@@ -15,14 +14,17 @@ def db_query():
             """
         )
 
-        result = session.execute(query).fetchall()
+        result = (await session.execute(query)).fetchall()
+
+    if result[0][0] is None:
+        return None
 
     return int(result[0][0])
 
 
 @api_router.get("/catalogue/last-update")
-def get_last_update():
-    last_update_unix_time = db_query()
+async def get_last_update():
+    last_update_unix_time = await db_query()
 
     if not last_update_unix_time:
         raise HTTPException(status_code=404, detail="No data available")
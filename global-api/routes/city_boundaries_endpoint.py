@@ -1,75 +1,134 @@
-from db.database import SessionLocal
-from fastapi import HTTPException, APIRouter
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text, and_
+from db.database import AsyncSessionLocal
+from fastapi import HTTPException, APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 import json
-from models.osm import Osm
+import math
+from models.osm import Osm, OsmBoundary
 from decimal import Decimal
-from shapely.geometry import Point, shape
-from shapely.wkt import loads
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from utils.spatial_index import city_index, current_city_index
 
 api_router = APIRouter(prefix="/api/v0")
 
+MAX_BATCH_POINTS = 10000
+
+# simplification tolerances (degrees) precomputed by the OSM importer
+# (TOLERANCES in importer/osm/osm_boundary_importer.py); 0 is the full geometry
+BOUNDARY_TOLERANCES = [0.0, 0.0001, 0.001, 0.01]
+
+
+class Coordinate(BaseModel):
+    lat: float
+    lon: float
+
+
+class CoordinatesRequest(BaseModel):
+    points: List[Coordinate] = Field(..., max_length=MAX_BATCH_POINTS)
+
 
 # Extract the polygon by locode
-def db_query(locode):
+async def db_query(locode):
 
     row = None
 
-    with SessionLocal() as session:
-        row = session.query(Osm).filter(Osm.locode == locode).limit(1).first()
+    async with AsyncSessionLocal() as session:
+        query = select(Osm).where(Osm.locode == locode).limit(1)
+        row = (await session.execute(query)).scalars().first()
+
+    return row
+
+
+# Extract the boundary variant precomputed at import time by locode and tolerance
+async def db_query_boundary(locode, tolerance):
+
+    async with AsyncSessionLocal() as session:
+        query = (
+            select(
+                OsmBoundary.geometry,
+                OsmBoundary.geojson,
+                Osm.bbox_north,
+                Osm.bbox_south,
+                Osm.bbox_east,
+                Osm.bbox_west,
+            )
+            .join(Osm, Osm.locode == OsmBoundary.locode)
+            .where(OsmBoundary.locode == locode, OsmBoundary.tolerance == tolerance)
+        )
+        row = (await session.execute(query)).first()
 
     return row
 
 
 @api_router.get("/cityboundary/city/{locode}")
-def get_city_boundary(locode: str):
-    city = db_query(locode)
+async def get_city_boundary(
+    locode: str, format: Optional[str] = None, tolerance: Optional[float] = None
+):
+    """City polygon as WKT (default) or GeoJSON (`format=geojson`), optionally
+    simplified by `tolerance` degrees, one of 0, 0.0001, 0.001 or 0.01; the
+    variants are precomputed by the OSM importer"""
+
+    if format not in (None, "wkt", "geojson"):
+        raise HTTPException(status_code=400, detail="format must be wkt or geojson")
+
+    if tolerance is not None:
+        level = next(
+            (level for level in BOUNDARY_TOLERANCES if math.isclose(level, tolerance)),
+            None,
+        )
+        if level is None:
+            allowed = ", ".join(str(level) for level in BOUNDARY_TOLERANCES)
+            raise HTTPException(status_code=400, detail=f"tolerance must be one of {allowed}")
+        tolerance = level
+
+    if format != "geojson" and tolerance is None:
+        city = await db_query(locode)
+    else:
+        city = await db_query_boundary(locode, tolerance or 0.0)
 
     if not city:
         raise HTTPException(status_code=404, detail="City boundary not found")
 
-    return {
-        "city_geometry": city.geometry,
+    bbox = {
         "bbox_north": city.bbox_north,
         "bbox_south": city.bbox_south,
         "bbox_east": city.bbox_east,
         "bbox_west": city.bbox_west,
     }
 
-@api_router.get("/cityboundary/locode/{lat}/{lon}")
-def get_locode(lat: Decimal, lon: Decimal):
-    """Returns the locode(s) of the city(ies) that contains the given coordinates"""
+    if format == "geojson":
+        # the GeoJSON is stored serialized; splice it in instead of parsing it back
+        content = '{"city_geometry": ' + city.geojson + ", " + json.dumps(bbox)[1:]
+        return Response(content=content, media_type="application/json")
 
-    # Get candidate cities whose bounding box is around our point
+    return {"city_geometry": city.geometry, **bbox}
 
-    candidates = []
-
-    with SessionLocal() as session:
+@api_router.get("/cityboundary/locode/{lat}/{lon}")
+async def get_locode(lat: Decimal, lon: Decimal):
+    """Returns the locode(s) of the city(ies) that contains the given coordinates"""
 
-        query = session.query(Osm).filter(
-            and_(
-                Osm.bbox_north >= lat,
-                Osm.bbox_south <= lat,
-                Osm.bbox_east >= lon,
-                Osm.bbox_west <= lon
-            )
-        )
+    # The index is inherited from the gunicorn master; build it now otherwise
 
-        candidates = query.all()
+    index = current_city_index() or await run_in_threadpool(city_index)
 
-    # Filter the candidates by the point being within the city polygon
+    # Return the list; can be empty
 
-    point = Point(lon, lat)
+    return {
+        "locodes": index.locate(float(lon), float(lat))
+    }
 
-    matches = filter(lambda x: point.within(loads(x.geometry)), candidates)
 
-    # Extract the locodes from the Osm objects
+@api_router.post("/cityboundary/locode")
+async def get_locodes(request: CoordinatesRequest):
+    """Returns the locodes of the cities containing each of the given coordinates,
+    one (possibly empty) list per point in request order"""
 
-    locodes = list(map(lambda x: x.locode, matches))
+    index = current_city_index() or await run_in_threadpool(city_index)
 
-    # Return the list; can be empty
+    lons = [point.lon for point in request.points]
+    lats = [point.lat for point in request.points]
 
     return {
-        "locodes": locodes
-    }
\ No newline at end of file
+        "locodes": index.locate_many(lons, lats)
+    }
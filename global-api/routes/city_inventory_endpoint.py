@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from routes import (
+    city_locode_endpoint,
+    city_locode_endpoint_crosswalk,
+    city_locode_endpoint_edgar,
+    city_locode_endpoint_ghgrp,
+    citywide_emission_endpoint,
+    country_code_endpoint,
+)
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport
+
+logger = logging.getLogger(__name__)
+
+api_router = APIRouter(prefix="/api/v0")
+
+# sources with their own tables; each returns {GPC refno: payload}
+city_sources = {
+    "climatetrace": city_locode_endpoint.inventory_totals,
+    "crosswalk": city_locode_endpoint_crosswalk.inventory_totals,
+    "edgar": city_locode_endpoint_edgar.inventory_totals,
+    "ghgrp_epa": city_locode_endpoint_ghgrp.inventory_totals,
+}
+
+
+@api_router.get("/city/{locode}/{year}/inventory")
+@cached
+async def get_city_inventory(locode: str, year: int, gwp: GwpReport = DEFAULT_GWP):
+    """Emissions of every source and sector/subsector for a city and year.
+
+    The sources are queried concurrently, so the slowest one sets the
+    latency. `inventory` is keyed by GPC reference number, then scope, then
+    source: `city` for the sources with their own tables, `citywide` and
+    `country` for the source names of those tables, the latter matched on
+    the country code of the locode. A partial inventory (some sources in
+    `unavailable_sources`) is sent with `Cache-Control: no-store`."""
+
+    lookups = {name: totals(locode, year, gwp) for name, totals in city_sources.items()}
+    lookups["citywide"] = citywide_emission_endpoint.inventory_totals(locode, year, gwp)
+    lookups["country"] = country_code_endpoint.inventory_totals(locode[:2], year, gwp)
+
+    results = await asyncio.gather(*lookups.values(), return_exceptions=True)
+
+    inventory = {}
+    unavailable = []
+
+    for name, result in zip(lookups, results):
+        if isinstance(result, Exception):
+            logger.error(f"Inventory of {locode} {year}: {name} failed: {result!r}")
+            unavailable.append(name)
+            continue
+
+        for key, payload in result.items():
+            if name in city_sources:
+                scope, reference_number, source = "city", key, name
+            else:
+                scope, (source, reference_number) = name, key
+            sources = inventory.setdefault(reference_number, {}).setdefault(scope, {})
+            sources[source] = payload
+
+    if not inventory and not unavailable:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    content = {
+        "locode": locode,
+        "year": year,
+        "inventory": dict(sorted(inventory.items())),
+        "unavailable_sources": unavailable,
+    }
+
+    # a partial inventory is returned as a response so it is not cached,
+    # and marked so that neither the ETag middleware nor clients keep it
+    if unavailable:
+        return JSONResponse(content=content, headers={"Cache-Control": "no-store"})
+
+    return content
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from functools import partial
+from fastapi import APIRouter, HTTPException, Query
 import math
 from sqlalchemy import text
-import pandas as pd
-from db.database import SessionLocal
+from typing import Optional
+from uuid import UUID
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport, co2eq_totals, gwp_factors
+from utils.records import (
+    MAX_PAGE_SIZE,
+    format_cell,
+    group_by_key,
+    ndjson_response,
+    next_cursor,
+    PointsFormat,
+    records_to_columns,
+    stream_records,
+    values_list,
+)
 
 api_router = APIRouter(prefix="/api/v0")
 
-gas_to_gwp100 = {"co2": 1, "ch4": 29.8, "n2o": 273}
-gas_to_gwp20 = {"co2": 1, "ch4": 82.5, "n2o": 273}
-
 gpc_quality_data = "TBD"
 gpc_quality_EF = "TBD"
 
@@ -20,130 +33,333 @@ def not_nan_or_none(value):
     return value is not None and value != ""
 
 
+def asset_points(columns, gwp=DEFAULT_GWP):
+    """build the list of points from the asset columns in a single pass"""
+    # an empty page (e.g. past the last row) has no columns
+    if not columns:
+        return []
+
+    gases = ["co2", "ch4", "n2o"]
+    factors = gwp_factors(gwp)
+
+    text = {
+        name: [format_cell(value) for value in columns[name]]
+        for name in [
+            "lat",
+            "lon",
+            "capacity",
+            "capacity_factor",
+            "activity",
+            "emissions_factor",
+            "emissions_quantity",
+        ]
+    }
+
+    rows = zip(
+        columns["gas"],
+        columns["emissions_quantity"],
+        columns["asset_name"],
+        columns["asset_id"],
+        columns["capacity_units"],
+        columns["activity_units"],
+        columns["emissions_factor_units"],
+        columns["emissions_quantity_units"],
+        text["lat"],
+        text["lon"],
+        text["capacity"],
+        text["capacity_factor"],
+        text["activity"],
+        text["emissions_factor"],
+        text["emissions_quantity"],
+    )
+
+    list_of_points = []
+
+    for (
+        gas,
+        emissions_quantity,
+        asset_name,
+        asset_id,
+        capacity_units,
+        activity_units,
+        emissions_factor_units,
+        emissions_quantity_units,
+        lat,
+        lon,
+        capacity,
+        capacity_factor,
+        activity,
+        emissions_factor,
+        emissions_quantity_text,
+    ) in rows:
+        if gas not in gases or not not_nan_or_none(emissions_quantity):
+            continue
+
+        gwp100 = factors["100yr"][gas]
+        gwp20 = factors["20yr"][gas]
+
+        ownership = {
+            "asset_name": asset_name,
+            "asset_id": asset_id,
+            "lat": lat,
+            "lon": lon,
+        }
+
+        capacity = {
+            "value": capacity,
+            "units": capacity_units,
+            "factor": capacity_factor if capacity_factor != "None" else "NA",
+        }
+
+        activity = {
+            "value": activity,
+            "units": activity_units,
+            "gpc_quality": str(gpc_quality_data),
+        }
+
+        emissions_factor = {
+            "gas": gas,
+            "value": emissions_factor,
+            "units": emissions_factor_units,
+            "gpc_quality": str(gpc_quality_EF),
+        }
+
+        emissions = {
+            "gas": gas,
+            "value": emissions_quantity_text,
+            "units": emissions_quantity_units,
+            "co2eq_100yr": str(emissions_quantity * gwp100),
+            "co2eq_20yr": str(emissions_quantity * gwp20),
+            "gpc_quality": str(gpc_quality_data),
+        }
+
+        point_data = {
+            "ownership": ownership,
+            "capacity": capacity,
+            "activity": activity,
+            "emissions_factor": emissions_factor,
+            "emissions": emissions,
+        }
+
+        list_of_points.append(point_data)
+
+    return list_of_points
+
+
+def year_range(year):
+    """half-open [start, end) timestamp range covering the calendar year"""
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
+def points_query(locode, year, reference_number, cursor=None, limit=None):
+    """query and params for the assets, optionally paginated by id"""
+    start_time, end_time = year_range(year)
+
+    sql = """
+        SELECT * FROM asset
+        WHERE reference_number = :reference_number
+        AND locode = :locode
+        AND end_time >= :start_time
+        AND end_time < :end_time
+        """
+
+    params = {
+        "locode": locode,
+        "start_time": start_time,
+        "end_time": end_time,
+        "reference_number": reference_number,
+    }
+
+    if cursor is not None:
+        sql += "AND id > CAST(:cursor AS uuid)\n"
+        params["cursor"] = str(cursor)
+
+    sql += "ORDER BY id\n"
+
+    if limit is not None:
+        sql += "LIMIT :limit\n"
+        params["limit"] = limit
+
+    return text(sql), params
+
+
 # Extract the data by locode, year and sector/subsector
-def db_query(locode, year, reference_number):
-    with SessionLocal() as session:
+async def db_query(locode, year, reference_number, cursor=None, limit=None):
+    query, params = points_query(locode, year, reference_number, cursor, limit)
+
+    async with AsyncSessionLocal() as session:
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+# Sum the emissions per gas by locode, year and sector/subsector
+async def db_query_totals(locode, year, reference_number):
+    start_time, end_time = year_range(year)
+
+    async with AsyncSessionLocal() as session:
         query = text(
             """
-            SELECT * FROM asset
+            SELECT gas, SUM(emissions_quantity) AS emissions_quantity
+            FROM asset
             WHERE reference_number = :reference_number
             AND locode = :locode
-            AND EXTRACT(YEAR FROM end_time) = :year;
+            AND end_time >= :start_time
+            AND end_time < :end_time
+            GROUP BY gas;
             """
         )
 
-        params = {"locode": locode, "year": year, "reference_number": reference_number}
-        result = session.execute(query, params).fetchall()
+        params = {
+            "locode": locode,
+            "start_time": start_time,
+            "end_time": end_time,
+            "reference_number": reference_number,
+        }
+        result = (await session.execute(query, params)).fetchall()
 
     return result
 
 
-@api_router.get("/climatetrace/city/{locode}/{year}/{gpcReferenceNumber}")
-def get_emissions_by_city_and_year(locode: str, year: int, gpcReferenceNumber: str):
-    gases = ["co2", "ch4", "n2o"]
-
-    records = db_query(locode, year, gpcReferenceNumber)
-
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
+def emissions_totals(series, gwp=DEFAULT_GWP):
+    """totals payload from the summed emissions per gas
 
-    df = pd.DataFrame(records)
+    ClimateTRACE reports its own AR6 CO2e per asset, covering every gas it
+    tracks, so the AR6 totals are the reported ones; other reports are
+    computed from the CO2, CH4 and N2O masses.
+    """
+    co2eq = co2eq_totals({gas: series.get(gas, 0) for gas in ["co2", "ch4", "n2o"]}, gwp)
 
-    series = (
-        df.groupby("gas")
-        .sum("emissions_quantity")
-        .astype({"emissions_quantity": int})
-        .loc[:, ["emissions_quantity"]]
-        .squeeze()
-    )
+    if GwpReport(gwp) == GwpReport.AR6:
+        co2eq["co2eq_100yr"] = series.get("co2e_100yr", 0)
+        co2eq["co2eq_20yr"] = series.get("co2e_20yr", 0)
 
-    totals = {
+    return {
         "totals": {
             "emissions": {
                 "co2_mass": str(series.get("co2", 0)),
-                "co2_co2eq": str(series.get("co2", 0)),
+                "co2_co2eq": str(co2eq["co2_co2eq"]),
                 "ch4_mass": str(series.get("ch4", 0)),
-                "ch4_co2eq_100yr": str(series.get("ch4", 0) * gas_to_gwp100.get("ch4")),
-                "ch4_co2eq_20yr": str(series.get("ch4", 0) * gas_to_gwp20.get("ch4")),
+                "ch4_co2eq_100yr": str(co2eq["ch4_co2eq_100yr"]),
+                "ch4_co2eq_20yr": str(co2eq["ch4_co2eq_20yr"]),
                 "n2o_mass": str(series.get("n2o", 0)),
-                "n2o_co2eq_100yr": str(series.get("n2o", 0) * gas_to_gwp100.get("n2o")),
-                "n2o_co2eq_20yr": str(series.get("n2o", 0) * gas_to_gwp20.get("n2o")),
-                "co2eq_100yr": str(series.get("co2e_100yr", 0)),
-                "co2eq_20yr": str(series.get("co2e_20yr", 0)),
+                "n2o_co2eq_100yr": str(co2eq["n2o_co2eq_100yr"]),
+                "n2o_co2eq_20yr": str(co2eq["n2o_co2eq_20yr"]),
+                "co2eq_100yr": str(co2eq["co2eq_100yr"]),
+                "co2eq_20yr": str(co2eq["co2eq_20yr"]),
                 "gpc_quality": str(gpc_quality_data),
             }
         }
     }
 
-    list_of_points = []
 
-    for _, row_data in df.iterrows():
-        row = row_data.to_frame().T
+# Sum the emissions per gas for many (locode, year, reference_number) keys
+async def db_query_batch(keys):
+    values, params = values_list(keys, types=("text", "integer", "text"))
 
-        gas = row["gas"].item()
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT k.locode, k.year, k.reference_number, a.gas,
+                SUM(a.emissions_quantity) AS emissions_quantity
+            FROM (VALUES {values}) AS k(locode, year, reference_number)
+            JOIN asset a
+            ON a.locode = k.locode
+            AND a.reference_number = k.reference_number
+            AND a.end_time >= make_timestamp(k.year, 1, 1, 0, 0, 0)
+            AND a.end_time < make_timestamp(k.year + 1, 1, 1, 0, 0, 0)
+            GROUP BY k.locode, k.year, k.reference_number, a.gas;
+            """
+        )
 
-        conditions = [
-            gas in gases,
-            not_nan_or_none(row["emissions_quantity"].item()),
-        ]
+        result = (await session.execute(query, params)).fetchall()
 
-        if all(conditions):
-            gwp100 = gas_to_gwp100.get(gas)
-            gwp20 = gas_to_gwp20.get(gas)
+    return result
 
-            capacity_factor = (
-                row["capacity_factor"].to_string(index=False, header=False).strip()
-            )
 
-            ownership = {
-                "asset_name": row["asset_name"].item(),
-                "asset_id": row["asset_id"].item(),
-                "lat": row["lat"].to_string(index=False, header=False).strip(),
-                "lon": row["lon"].to_string(index=False, header=False).strip(),
-            }
+async def batch_totals(keys, gwp=DEFAULT_GWP):
+    """totals payload for each (locode, year, reference_number) key with data"""
+    grouped = group_by_key(
+        await db_query_batch(keys), lambda row: (row.locode, row.year, row.reference_number)
+    )
 
-            capacity = {
-                "value": row["capacity"].to_string(index=False, header=False).strip(),
-                "units": row["capacity_units"].item(),
-                "factor": capacity_factor if capacity_factor != "None" else "NA",
-            }
+    return {
+        key: emissions_totals(
+            {row.gas: int(row.emissions_quantity or 0) for row in rows}, gwp
+        )
+        for key, rows in grouped.items()
+    }
 
-            activity = {
-                "value": row["activity"].to_string(index=False, header=False).strip(),
-                "units": row["activity_units"].item(),
-                "gpc_quality": str(gpc_quality_data),
-            }
 
-            emissions_factor = {
-                "gas": gas,
-                "value": row["emissions_factor"]
-                .to_string(index=False, header=False)
-                .strip(),
-                "units": row["emissions_factor_units"].item(),
-                "gpc_quality": str(gpc_quality_EF),
-            }
+# Sum the emissions per sector/subsector and gas of a city for a year
+async def db_query_inventory(locode, year):
+    start_time, end_time = year_range(year)
 
-            emissions = {
-                "gas": gas,
-                "value": row["emissions_quantity"]
-                .to_string(index=False, header=False)
-                .strip(),
-                "units": row["emissions_quantity_units"].item(),
-                "co2eq_100yr": str(row["emissions_quantity"].item() * gwp100),
-                "co2eq_20yr": str(row["emissions_quantity"].item() * gwp20),
-                "gpc_quality": str(gpc_quality_data),
-            }
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT reference_number, gas, SUM(emissions_quantity) AS emissions_quantity
+            FROM asset
+            WHERE locode = :locode
+            AND end_time >= :start_time
+            AND end_time < :end_time
+            GROUP BY reference_number, gas;
+            """
+        )
 
-            point_data = {
-                "ownership": ownership,
-                "capacity": capacity,
-                "activity": activity,
-                "emissions_factor": emissions_factor,
-                "emissions": emissions,
-            }
+        params = {"locode": locode, "start_time": start_time, "end_time": end_time}
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
 
-            list_of_points.append(point_data)
+
+async def inventory_totals(locode, year, gwp=DEFAULT_GWP):
+    """totals payload for each sector/subsector with data for the city"""
+    grouped = group_by_key(await db_query_inventory(locode, year), lambda row: row.reference_number)
+
+    return {
+        reference_number: emissions_totals(
+            {row.gas: int(row.emissions_quantity or 0) for row in rows}, gwp
+        )
+        for reference_number, rows in grouped.items()
+    }
+
+
+@api_router.get("/climatetrace/city/{locode}/{year}/{gpcReferenceNumber}")
+@cached
+async def get_emissions_by_city_and_year(
+    locode: str,
+    year: int,
+    gpcReferenceNumber: str,
+    include_points: bool = False,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[UUID] = None,
+    format: Optional[PointsFormat] = None,
+    gwp: GwpReport = DEFAULT_GWP,
+):
+    records = await db_query_totals(locode, year, gpcReferenceNumber)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    series = {gas: int(total or 0) for gas, total in records}
+
+    totals = emissions_totals(series, gwp)
+
+    if format == PointsFormat.ndjson:
+        query, params = points_query(locode, year, gpcReferenceNumber, cursor)
+        return ndjson_response(totals, stream_records(query, params), partial(asset_points, gwp=gwp))
+
+    if not include_points and limit is None:
+        return totals
+
+    records = await db_query(locode, year, gpcReferenceNumber, cursor, limit)
+
+    list_of_points = asset_points(records_to_columns(records), gwp)
 
     points = {"points": list_of_points}
 
+    if limit is not None:
+        points["next_cursor"] = next_cursor(records, limit)
+
     return {**totals, **points}
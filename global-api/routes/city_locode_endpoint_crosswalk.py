@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
-import pandas as pd
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport, co2eq_totals
+from utils.records import group_by_key, values_list
 
 api_router = APIRouter(prefix="/api/v0")
 
@@ -9,19 +11,14 @@ api_router = APIRouter(prefix="/api/v0")
 gpc_quality_data = "TBD"
 
 
-# Extract the data by locode, year and sector/subsector
-def db_query(locode, year, reference_number):
-    with SessionLocal() as session:
+# Sum the area-weighted emissions per gas by locode, year and sector/subsector
+async def db_query(locode, year, reference_number):
+    async with AsyncSessionLocal() as session:
         query = text(
             """
             SELECT
-                cco.cell_id,
-                cg.area,
-                cco.fraction_in_city,
-                gce.emissions_quantity,
                 gce.gas,
-                gce.year,
-                gce.reference_number
+                SUM(cg.area * cco.fraction_in_city * gce.emissions_quantity) AS emissions_total
             FROM
                 "crosswalk_CityGridOverlap" cco
             JOIN
@@ -30,42 +27,117 @@ def db_query(locode, year, reference_number):
                 "crosswalk_GridCellEmissions" gce ON cco.cell_id = gce.cell_id
             WHERE cco.locode = :locode
             AND gce.reference_number = :reference_number
-            AND gce.year = :year;"""
+            AND gce.year = :year
+            GROUP BY gce.gas;"""
         )
 
         params = {"locode": locode, "year": year, "reference_number": reference_number}
-        result = session.execute(query, params).fetchall()
+        result = (await session.execute(query, params)).fetchall()
 
     return result
 
 
-@api_router.get("/crosswalk/city/{locode}/{year}/{gpcReferenceNumber}")
-def get_emissions_by_city_and_year(locode: str, year: int, gpcReferenceNumber: str):
-    records = db_query(locode, year, gpcReferenceNumber)
-
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
-
-    series = (
-        pd.DataFrame(records)
-        .assign(
-            emissions_total=lambda row: row["area"]
-            * row["fraction_in_city"]
-            * row["emissions_quantity"]
-        )
-        .groupby("gas")
-        .sum("emissions_total")
-        .astype({"emissions_total": int})
-        .loc[:, ["emissions_total"]]
-        .squeeze()
-    )
+def emissions_totals(series, gwp=DEFAULT_GWP):
+    """totals payload from the weighted emissions per gas"""
+    co2eq = co2eq_totals(series, gwp)
 
     totals = {
         "emissions": {
             "co2_mass": series.get("CO2", 0),
-            "co2_co2eq": series.get("CO2", 0),
+            "co2_co2eq": co2eq["co2_co2eq"],
             "gpc_quality": gpc_quality_data,
         }
     }
 
     return {"totals": totals}
+
+
+# Sum the area-weighted emissions per gas for many (locode, year, reference_number) keys
+async def db_query_batch(keys):
+    values, params = values_list(keys)
+
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT
+                cco.locode,
+                gce.year,
+                gce.reference_number,
+                gce.gas,
+                SUM(cg.area * cco.fraction_in_city * gce.emissions_quantity) AS emissions_total
+            FROM
+                "crosswalk_CityGridOverlap" cco
+            JOIN
+                "crosswalk_GridCell" cg ON cco.cell_id = cg.id
+            JOIN
+                "crosswalk_GridCellEmissions" gce ON cco.cell_id = gce.cell_id
+            WHERE (cco.locode, gce.year, gce.reference_number) IN ({values})
+            GROUP BY cco.locode, gce.year, gce.reference_number, gce.gas;"""
+        )
+
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def batch_totals(keys, gwp=DEFAULT_GWP):
+    """totals payload for each (locode, year, reference_number) key with data"""
+    grouped = group_by_key(
+        await db_query_batch(keys), lambda row: (row.locode, row.year, row.reference_number)
+    )
+
+    return {
+        key: emissions_totals({row.gas: int(row.emissions_total) for row in rows}, gwp)
+        for key, rows in grouped.items()
+    }
+
+
+# Sum the area-weighted emissions per sector/subsector and gas of a city for a year
+async def db_query_inventory(locode, year):
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT
+                gce.reference_number,
+                gce.gas,
+                SUM(cg.area * cco.fraction_in_city * gce.emissions_quantity) AS emissions_total
+            FROM
+                "crosswalk_CityGridOverlap" cco
+            JOIN
+                "crosswalk_GridCell" cg ON cco.cell_id = cg.id
+            JOIN
+                "crosswalk_GridCellEmissions" gce ON cco.cell_id = gce.cell_id
+            WHERE cco.locode = :locode
+            AND gce.year = :year
+            GROUP BY gce.reference_number, gce.gas;"""
+        )
+
+        params = {"locode": locode, "year": year}
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def inventory_totals(locode, year, gwp=DEFAULT_GWP):
+    """totals payload for each sector/subsector with data for the city"""
+    grouped = group_by_key(await db_query_inventory(locode, year), lambda row: row.reference_number)
+
+    return {
+        reference_number: emissions_totals({row.gas: int(row.emissions_total) for row in rows}, gwp)
+        for reference_number, rows in grouped.items()
+    }
+
+
+@api_router.get("/crosswalk/city/{locode}/{year}/{gpcReferenceNumber}")
+@cached
+async def get_emissions_by_city_and_year(
+    locode: str, year: int, gpcReferenceNumber: str, gwp: GwpReport = DEFAULT_GWP
+):
+    records = await db_query(locode, year, gpcReferenceNumber)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    series = {row.gas: int(row.emissions_total) for row in records}
+
+    return emissions_totals(series, gwp)
@@ -1,24 +1,40 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
-import pandas as pd
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport, co2eq_totals
+from utils.records import group_by_key, values_list
 
 api_router = APIRouter(prefix="/api/v0")
 
-# AR6 GWP
-ch4_GWP_100yr = 29.8
-ch4_GWP_20yr = 82.5
-n2o_GWP_100yr = 273
-n2o_GWP_20yr = 273
-
 # GPC quality classification
 gpc_quality_data = "medium"
 gpc_quality_EF = "TBD"
 
 
-# Extract the data by locode, year and sector/subsector
-def db_query(locode, year, reference_number):
-    with SessionLocal() as session:
+# Extract the precomputed city totals by locode, year and sector/subsector
+async def db_query(locode, year, reference_number):
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT gas, emissions_quantity AS total_emissions
+            FROM "CityEmissionsEdgar"
+            WHERE locode = :locode
+            AND year = :year
+            AND reference_number = :reference_number"""
+        )
+
+        params = {"locode": locode, "year": year, "reference_number": reference_number}
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+# Aggregate the grid cells overlapping the city on the fly; used to
+# validate the CityEmissionsEdgar rollup against the source tables
+async def db_query_live(locode, year, reference_number):
+    async with AsyncSessionLocal() as session:
         query = text(
             """
             SELECT
@@ -37,20 +53,16 @@ def db_query(locode, year, reference_number):
         )
 
         params = {"locode": locode, "year": year, "reference_number": reference_number}
-        result = session.execute(query, params).fetchall()
+        result = (await session.execute(query, params)).fetchall()
 
     return result
 
 def cvt(value):
     return str(int(round(float(value))))
 
-@api_router.get("/edgar/city/{locode}/{year}/{gpcReferenceNumber}")
-def get_emissions_by_city_and_year(locode: str, year: int, gpcReferenceNumber: str):
-    records = db_query(locode, year, gpcReferenceNumber)
-
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
 
+def emissions_totals(records, gwp=DEFAULT_GWP):
+    """totals payload from (gas, mass) rows"""
     masses = {'CO2': 0.0, 'CH4': 0.0, 'N2O': 0.0}
 
     for record in records:
@@ -58,22 +70,117 @@ def get_emissions_by_city_and_year(locode: str, year: int, gpcReferenceNumber: s
         mass = record[1]
         masses[gas] += float(mass)
 
+    co2eq = co2eq_totals(masses, gwp)
+
     totals = {
         "totals": {
             "emissions": {
                 "co2_mass": cvt(masses["CO2"]),
-                "co2_co2eq": cvt(masses["CO2"]),
+                "co2_co2eq": cvt(co2eq["co2_co2eq"]),
                 "ch4_mass": cvt(masses["CH4"]),
-                "ch4_co2eq_100yr": cvt(masses["CH4"] * ch4_GWP_100yr),
-                "ch4_co2eq_20yr": cvt(masses["CH4"] * ch4_GWP_20yr),
+                "ch4_co2eq_100yr": cvt(co2eq["ch4_co2eq_100yr"]),
+                "ch4_co2eq_20yr": cvt(co2eq["ch4_co2eq_20yr"]),
                 "n2o_mass": cvt(masses["N2O"]),
-                "n2o_co2eq_100yr": cvt(masses["N2O"] * n2o_GWP_100yr),
-                "n2o_co2eq_20yr": cvt(masses["N2O"] * n2o_GWP_20yr),
+                "n2o_co2eq_100yr": cvt(co2eq["n2o_co2eq_100yr"]),
+                "n2o_co2eq_20yr": cvt(co2eq["n2o_co2eq_20yr"]),
                 "gpc_quality": gpc_quality_data,
-                "co2eq_100yr": cvt(masses["CO2"] + masses["CH4"] * ch4_GWP_100yr + masses["N2O"] * n2o_GWP_100yr),
-                "co2eq_20yr": cvt(masses["CO2"] + masses["CH4"] * ch4_GWP_20yr + masses["N2O"] * n2o_GWP_20yr)
+                "co2eq_100yr": cvt(co2eq["co2eq_100yr"]),
+                "co2eq_20yr": cvt(co2eq["co2eq_20yr"])
             }
         }
     }
 
     return totals
+
+
+# Extract the precomputed city totals for many (locode, year, reference_number) keys
+async def db_query_batch(keys):
+    values, params = values_list(keys)
+
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT locode, year, reference_number, gas, emissions_quantity
+            FROM "CityEmissionsEdgar"
+            WHERE (locode, year, reference_number) IN ({values})"""
+        )
+
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def batch_totals(keys, gwp=DEFAULT_GWP):
+    """totals payload for each (locode, year, reference_number) key with data"""
+    grouped = group_by_key(
+        await db_query_batch(keys), lambda row: (row.locode, row.year, row.reference_number)
+    )
+
+    return {
+        key: emissions_totals([(row.gas, row.emissions_quantity) for row in rows], gwp)
+        for key, rows in grouped.items()
+    }
+
+
+# Extract the precomputed totals per sector/subsector of a city for a year
+async def db_query_inventory(locode, year):
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT reference_number, gas, emissions_quantity
+            FROM "CityEmissionsEdgar"
+            WHERE locode = :locode
+            AND year = :year"""
+        )
+
+        params = {"locode": locode, "year": year}
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def inventory_totals(locode, year, gwp=DEFAULT_GWP):
+    """totals payload for each sector/subsector with data for the city"""
+    grouped = group_by_key(await db_query_inventory(locode, year), lambda row: row.reference_number)
+
+    return {
+        reference_number: emissions_totals([(row.gas, row.emissions_quantity) for row in rows], gwp)
+        for reference_number, rows in grouped.items()
+    }
+
+
+@cached
+async def city_totals(locode, year, reference_number, gwp=DEFAULT_GWP):
+    """totals payload from the precomputed CityEmissionsEdgar rollup"""
+    records = await db_query(locode, year, reference_number)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    return emissions_totals(records, gwp)
+
+
+@api_router.get("/edgar/city/{locode}/{year}/{gpcReferenceNumber}")
+async def get_emissions_by_city_and_year(
+    locode: str,
+    year: int,
+    gpcReferenceNumber: str,
+    live: bool = False,
+    gwp: GwpReport = DEFAULT_GWP,
+):
+    if not live:
+        return await city_totals(
+            locode=locode, year=year, reference_number=gpcReferenceNumber, gwp=gwp
+        )
+
+    # the live join checks the rollup against the source tables, so it is
+    # never served from the response cache nor revalidated with an ETag;
+    # the importers do not bump the data version
+    records = await db_query_live(locode, year, gpcReferenceNumber)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    return JSONResponse(
+        content=emissions_totals(records, gwp), headers={"Cache-Control": "no-store"}
+    )
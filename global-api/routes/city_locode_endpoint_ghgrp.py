@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 import math
 from sqlalchemy import text
-import pandas as pd
-from db.database import SessionLocal
+from typing import Optional
+from uuid import UUID
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.records import (
+    MAX_PAGE_SIZE,
+    format_cell,
+    ndjson_response,
+    next_cursor,
+    PointsFormat,
+    records_to_columns,
+    stream_records,
+    values_list,
+)
 
 api_router = APIRouter(prefix="/api/v0")
 
@@ -19,34 +31,138 @@ def not_nan_or_none(value):
     return value is not None and value != ""
 
 
+def facility_points(columns):
+    """build the list of points from the facility columns in a single pass"""
+    # an empty page (e.g. past the last row) has no columns
+    if not columns:
+        return []
+
+    text = {
+        name: [format_cell(value) for value in columns[name]]
+        for name in ["latitude", "longitude", "emissions_quantity"]
+    }
+
+    rows = zip(
+        columns["gas"],
+        columns["emissions_quantity"],
+        columns["facility_name"],
+        columns["facility_id"],
+        columns["sectors"],
+        columns["subparts"],
+        columns["final_sector"],
+        columns["subpart_name"],
+        columns["emissions_quantity_units"],
+        text["latitude"],
+        text["longitude"],
+        text["emissions_quantity"],
+    )
+
+    list_of_points = []
+
+    for (
+        gas,
+        emissions_quantity,
+        facility_name,
+        facility_id,
+        sectors,
+        subparts,
+        final_sector,
+        subpart_name,
+        emissions_quantity_units,
+        latitude,
+        longitude,
+        emissions_quantity_text,
+    ) in rows:
+        if not not_nan_or_none(emissions_quantity):
+            continue
+
+        ownership = {
+            "facility_name": facility_name,
+            "facility_id": facility_id,
+            "lat": latitude,
+            "lon": longitude,
+        }
+
+        industry_type = {
+            "sectors": sectors,
+            "subparts": subparts,
+            "final_sector": final_sector,
+            "final_subpart": subpart_name,
+        }
+
+        emissions = {
+            "gas": gas,
+            "value": emissions_quantity_text,
+            "units": emissions_quantity_units,
+            "gpc_quality": str(gpc_quality_data),
+        }
+
+        point_data = {
+            "ownership": ownership,
+            "industry_type": industry_type,
+            "emissions": emissions,
+        }
+
+        list_of_points.append(point_data)
+
+    return list_of_points
+
+
+def points_query(locode, year, GPC_ref_no, cursor=None, limit=None):
+    """query and params for the facilities, optionally paginated by id"""
+    sql = """
+        SELECT * FROM ghgrp_epa
+        WHERE "GPC_ref_no" = :GPC_ref_no
+        AND locode = :locode
+        AND year = :year
+        """
+
+    params = {"locode": locode, "year": year, "GPC_ref_no": GPC_ref_no}
+
+    if cursor is not None:
+        sql += "AND id > CAST(:cursor AS uuid)\n"
+        params["cursor"] = str(cursor)
+
+    sql += "ORDER BY id\n"
+
+    if limit is not None:
+        sql += "LIMIT :limit\n"
+        params["limit"] = limit
+
+    return text(sql), params
+
+
 # Extract the data by locode, year and sector/subsector
-def db_query(locode, year, GPC_ref_no):
-    with SessionLocal() as session:
+async def db_query(locode, year, GPC_ref_no, cursor=None, limit=None):
+    query, params = points_query(locode, year, GPC_ref_no, cursor, limit)
+
+    async with AsyncSessionLocal() as session:
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+# Sum the emissions by locode, year and sector/subsector
+async def db_query_totals(locode, year, GPC_ref_no):
+    async with AsyncSessionLocal() as session:
         query = text(
             """
-            SELECT * FROM ghgrp_epa
+            SELECT COUNT(*) AS facilities, SUM(emissions_quantity) AS emissions_quantity
+            FROM ghgrp_epa
             WHERE "GPC_ref_no" = :GPC_ref_no
             AND locode = :locode
             AND year = :year;
             """
         )
         params = {"locode": locode, "year": year, "GPC_ref_no": GPC_ref_no}
-        result = session.execute(query, params).fetchall()
+        result = (await session.execute(query, params)).fetchone()
 
     return result
 
 
-@api_router.get("/ghgrp_epa/city/{locode}/{year}/{gpcReferenceNumber}")
-def get_emissions_by_city_and_year(locode: str, year: str, gpcReferenceNumber: str):
-
-    records = db_query(locode, year, gpcReferenceNumber)
-
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
-
-    df = pd.DataFrame(records)
-
-    totals = {
+def emissions_totals(emissions_quantity):
+    """totals payload from the summed facility emissions (CO2e)"""
+    return {
         "totals": {
             "emissions": {
                 "co2_mass": "0",
@@ -57,57 +173,101 @@ def get_emissions_by_city_and_year(locode: str, year: str, gpcReferenceNumber: s
                 "n2o_mass": "0",
                 "n2o_co2eq_100yr": "0",
                 "n2o_co2eq_20yr": "0",
-                "co2eq_100yr": str(int(round(df["emissions_quantity"].sum()))),
+                "co2eq_100yr": str(int(round(emissions_quantity or 0))),
                 "co2eq_20yr": "0",
                 "gpc_quality": str(gpc_quality_data),
             }
         }
     }
 
-    list_of_points = []
 
-    for _, row_data in df.iterrows():
-        row = row_data.to_frame().T
+# Sum the emissions for many (locode, year, GPC_ref_no) keys
+async def db_query_batch(keys):
+    values, params = values_list(
+        (locode, str(year), GPC_ref_no) for locode, year, GPC_ref_no in keys
+    )
 
-        gas = row["gas"].item()
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT locode, year, "GPC_ref_no", SUM(emissions_quantity) AS emissions_quantity
+            FROM ghgrp_epa
+            WHERE (locode, year, "GPC_ref_no") IN ({values})
+            GROUP BY locode, year, "GPC_ref_no";
+            """
+        )
+        result = (await session.execute(query, params)).fetchall()
 
-        conditions = [
-            not_nan_or_none(row["emissions_quantity"].item()),
-        ]
+    return result
 
-        if all(conditions):
 
-            ownership = {
-                "facility_name": row["facility_name"].item(),
-                "facility_id": row["facility_id"].item(),
-                "lat": row["latitude"].to_string(index=False, header=False).strip(),
-                "lon": row["longitude"].to_string(index=False, header=False).strip(),
-            }
+async def batch_totals(keys, gwp=None):
+    """totals payload for each (locode, year, GPC_ref_no) key with data; GHGRP
+    publishes CO2e only, so `gwp` does not apply"""
+    return {
+        (row.locode, int(row.year), row.GPC_ref_no): emissions_totals(
+            row.emissions_quantity
+        )
+        for row in await db_query_batch(keys)
+    }
 
-            industry_type = {
-                "sectors": row["sectors"].item(),
-                "subparts": row["subparts"].item(),
-                "final_sector": row["final_sector"].item(),
-                "final_subpart": row["subpart_name"].item(),
-            }
 
-            emissions = {
-                "gas": gas,
-                "value": row["emissions_quantity"]
-                .to_string(index=False, header=False)
-                .strip(),
-                "units": row["emissions_quantity_units"].item(),
-                "gpc_quality": str(gpc_quality_data),
-            }
+# Sum the emissions per sector/subsector of a city for a year
+async def db_query_inventory(locode, year):
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT "GPC_ref_no", SUM(emissions_quantity) AS emissions_quantity
+            FROM ghgrp_epa
+            WHERE locode = :locode
+            AND year = :year
+            GROUP BY "GPC_ref_no";
+            """
+        )
+        params = {"locode": locode, "year": str(year)}
+        result = (await session.execute(query, params)).fetchall()
 
-            point_data = {
-                "ownership": ownership,
-                "industry_type": industry_type,
-                "emissions": emissions,
-            }
+    return result
+
+
+async def inventory_totals(locode, year, gwp=None):
+    """totals payload for each sector/subsector with data for the city; GHGRP
+    publishes CO2e only, so `gwp` does not apply"""
+    return {
+        row.GPC_ref_no: emissions_totals(row.emissions_quantity)
+        for row in await db_query_inventory(locode, year)
+    }
+
+
+@api_router.get("/ghgrp_epa/city/{locode}/{year}/{gpcReferenceNumber}")
+@cached
+async def get_emissions_by_city_and_year(
+    locode: str,
+    year: str,
+    gpcReferenceNumber: str,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[UUID] = None,
+    format: Optional[PointsFormat] = None,
+):
+
+    summary = await db_query_totals(locode, year, gpcReferenceNumber)
+
+    if not summary.facilities:
+        raise HTTPException(status_code=404, detail="No data available")
 
-            list_of_points.append(point_data)
+    totals = emissions_totals(summary.emissions_quantity)
+
+    if format == PointsFormat.ndjson:
+        query, params = points_query(locode, year, gpcReferenceNumber, cursor)
+        return ndjson_response(totals, stream_records(query, params), facility_points)
+
+    records = await db_query(locode, year, gpcReferenceNumber, cursor, limit)
+
+    list_of_points = facility_points(records_to_columns(records))
 
     points = {"points": list_of_points}
 
-    return {**totals, **points}
\ No newline at end of file
+    if limit is not None:
+        points["next_cursor"] = next_cursor(records, limit)
+
+    return {**totals, **points}
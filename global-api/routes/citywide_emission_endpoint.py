@@ -1,26 +1,28 @@
 from fastapi import APIRouter, HTTPException
 from sqlalchemy import text
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport, co2eq_totals
+from utils.records import group_by_key, values_list
 
 api_router = APIRouter(prefix="/api/v0")
 
-# TODO: establish best-practice values for these numbers
-
-CO2_EF_CH4_100yr = 30
-CO2_EF_N2O_100yr = 298
-
-CO2_EF_CH4_20yr = 84
-CO2_EF_N2O_20yr = 264
-
 # this is a placeholder for now
 gpc_quality_data = "NA"
 
+# columns read by the routes, all held by the lookup index so the
+# queries are answered from the index alone
+EMISSIONS_COLUMNS = """
+    source_name, locode, year, "GPC_refno", gas_name, emissions_value,
+    temporal_granularity, activity_name, activity_value, activity_units,
+    emission_factor_value, emission_factor_units"""
+
 # Extract the data by locode, year and sector/subsector
-def db_query(source_name, locode, year, GPC_refno):
-    with SessionLocal() as session:
+async def db_query(source_name, locode, year, GPC_refno):
+    async with AsyncSessionLocal() as session:
         query = text(
-            """
-            SELECT * FROM citywide_emissions
+            f"""
+            SELECT {EMISSIONS_COLUMNS} FROM citywide_emissions
             WHERE source_name = :source_name
             AND "GPC_refno" = :GPC_refno
             AND locode = :locode
@@ -28,19 +30,13 @@ def db_query(source_name, locode, year, GPC_refno):
             """
         )
         params = {"source_name": source_name, "locode": locode, "year": year, "GPC_refno": GPC_refno}
-        result = session.execute(query, params).fetchall()
+        result = (await session.execute(query, params)).fetchall()
 
     return result
 
 
-@api_router.get("/source/{source_name}/city/{locode}/{year}/{GPC_refno}")
-def get_emissions_by_locode_and_year(source_name: str, locode: str, year: str, GPC_refno: str):
-
-    records = db_query(source_name, locode, year, GPC_refno)
-
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
-
+def emissions_response(records, gwp=DEFAULT_GWP):
+    """totals and city emissions details payload from the matching records"""
     masses = {'CO2': 0, 'CH4': 0, 'N2O': 0}
 
     for record in records:
@@ -49,11 +45,13 @@ def get_emissions_by_locode_and_year(source_name: str, locode: str, year: str, G
         mass = record['emissions_value']
         masses[gas] += mass
 
+    co2eq = co2eq_totals(masses, gwp)
+
     totals = {
         "totals": {
             "emissions": {
-                "co2eq_100yr": str(round(masses["CO2"] + CO2_EF_CH4_100yr * masses["CH4"] + CO2_EF_N2O_100yr * masses["N2O"])),
-                "co2eq_20yr": str(round(masses["CO2"] + CO2_EF_CH4_20yr * masses["CH4"] + CO2_EF_N2O_20yr * masses["N2O"])),
+                "co2eq_100yr": str(round(co2eq["co2eq_100yr"])),
+                "co2eq_20yr": str(round(co2eq["co2eq_20yr"])),
                 "co2_mass": str(round(masses["CO2"])),
                 "ch4_mass": str(round(masses["CH4"])),
                 "n2o_mass": str(round(masses["N2O"])),
@@ -74,4 +72,71 @@ def get_emissions_by_locode_and_year(source_name: str, locode: str, year: str, G
         }
     }
 
-    return {**totals, **locode_info}
\ No newline at end of file
+    return {**totals, **locode_info}
+
+
+# Extract the data of one source for many (locode, year, GPC_refno) keys
+async def db_query_batch(source_name, keys):
+    values, params = values_list(keys)
+
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT {EMISSIONS_COLUMNS} FROM citywide_emissions
+            WHERE source_name = :source_name
+            AND (locode, year, "GPC_refno") IN ({values});
+            """
+        )
+        params["source_name"] = source_name
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def batch_totals(source_name, keys, gwp=DEFAULT_GWP):
+    """response payload for each (locode, year, GPC_refno) key with data"""
+    grouped = group_by_key(
+        await db_query_batch(source_name, keys),
+        lambda row: (row.locode, int(row.year), row.GPC_refno),
+    )
+
+    return {key: emissions_response(rows, gwp) for key, rows in grouped.items()}
+
+
+# Extract the data of every source and sector/subsector of a city for a year
+async def db_query_inventory(locode, year):
+    async with AsyncSessionLocal() as session:
+        query = text(
+            f"""
+            SELECT {EMISSIONS_COLUMNS} FROM citywide_emissions
+            WHERE locode = :locode
+            AND year = :year;
+            """
+        )
+        params = {"locode": locode, "year": year}
+        result = (await session.execute(query, params)).fetchall()
+
+    return result
+
+
+async def inventory_totals(locode, year, gwp=DEFAULT_GWP):
+    """response payload for each (source_name, GPC_refno) with data for the city"""
+    grouped = group_by_key(
+        await db_query_inventory(locode, year), lambda row: (row.source_name, row.GPC_refno)
+    )
+
+    return {key: emissions_response(rows, gwp) for key, rows in grouped.items()}
+
+
+@api_router.get("/source/{source_name}/city/{locode}/{year}/{GPC_refno}")
+@cached
+async def get_emissions_by_locode_and_year(
+    source_name: str, locode: str, year: int, GPC_refno: str, gwp: GwpReport = DEFAULT_GWP
+):
+
+    records = await db_query(source_name, locode, year, GPC_refno)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
+
+    return emissions_response(records, gwp)
\ No newline at end of file
@@ -2,31 +2,27 @@
 # -*- coding: utf-8 -*-
 
 from fastapi import APIRouter, HTTPException
-import math
 from sqlalchemy import text
-from db.database import SessionLocal
+from db.database import AsyncSessionLocal
+from utils.cache import cached
+from utils.emissions import DEFAULT_GWP, GwpReport, gwp_factors
+from utils.records import group_by_key
 
 api_router = APIRouter(prefix="/api/v0")
 
 gpc_quality_data = "low"
 
-gas_to_gwp100 = {"co2": 1, "ch4": 29.8, "n2o": 273}
-gas_to_gwp20 = {"co2": 1, "ch4": 82.5, "n2o": 273}
-
-def not_nan_or_none(value):
-    """return true if value is not nan, none, or empty"""
-    if isinstance(value, float | int):
-        return not math.isnan(value)
-    return value is not None and value != ""
+# gases of the totals; other gases of a source are ignored
+TOTALS_GASES = ("co2e", "co2", "ch4", "n2o")
 
 
 # Extract the data by locode, year and sector/subsector
-def db_query(source_name, country_code, year, GPC_refno):
+async def db_query(source_name, country_code, year, GPC_refno):
     rows = []
-    with SessionLocal() as session:
+    async with AsyncSessionLocal() as session:
         query = text(
             """
-            SELECT * FROM country_code
+            SELECT gas_name, emissions_value FROM country_code
             WHERE source_name = :source_name
             AND "GPC_refno" = :GPC_refno
             AND country_code = :country_code
@@ -34,66 +30,95 @@ def db_query(source_name, country_code, year, GPC_refno):
             """
         )
         params = {"source_name": source_name, "country_code": country_code, "year": year, "GPC_refno": GPC_refno}
-        result = session.execute(query, params)
+        result = await session.execute(query, params)
         rows = [row._asdict() for row in result]
 
     return rows
 
 
-@api_router.get("/source/{source_name}/country/{country_code}/{year}/{GPC_refno}")
-def get_emissions_by_country_and_year(source_name: str, country_code: str, year: str, GPC_refno: str):
+def cvt(value):
+    return str(int(round(float(value))))
+
+
+def emissions_totals(records, gwp=DEFAULT_GWP):
+    """totals payload from the records of one source and sector/subsector;
+    the co2e totals are the ones reported by the source"""
+    factors = gwp_factors(gwp)
+
+    # first value of each gas, in a single pass over the records; only the
+    # values that are kept are converted
+    masses = {}
+    for record in records:
+        gas = record["gas_name"]
+        if gas in TOTALS_GASES and gas not in masses:
+            masses[gas] = float(record["emissions_value"])
+
+    emissions = {
+        "co2_mass": "0",
+        "co2_co2eq": "0",
+        "ch4_mass": "0",
+        "ch4_co2eq_100yr": "0",
+        "ch4_co2eq_20yr": "0",
+        "n2o_mass": "0",
+        "n2o_co2eq_100yr": "0",
+        "n2o_co2eq_20yr": "0",
+        "gpc_quality": str(gpc_quality_data),
+    }
 
-    records = db_query(source_name, country_code, year, GPC_refno)
+    if "co2e" in masses:
+        emissions["co2eq_100yr"] = cvt(masses["co2e"])
+        emissions["co2eq_20yr"] = cvt(masses["co2e"])
 
-    if not records:
-        raise HTTPException(status_code=404, detail="No data available")
+    if "co2" in masses:
+        emissions["co2_mass"] = cvt(masses["co2"])
+        emissions["co2_co2eq"] = cvt(masses["co2"])
 
-    totals = {
-        "totals": {
-            "emissions": {
-                "co2_mass": "0",
-                "co2_co2eq": "0",
-                "ch4_mass": "0",
-                "ch4_co2eq_100yr": "0",
-                "ch4_co2eq_20yr": "0",
-                "n2o_mass": "0",
-                "n2o_co2eq_100yr": "0",
-                "n2o_co2eq_20yr": "0",
-                "gpc_quality": str(gpc_quality_data),
-            }
-        }
-    }
+    for gas in ["ch4", "n2o"]:
+        if gas in masses:
+            emissions[f"{gas}_mass"] = cvt(masses[gas])
+            emissions[f"{gas}_co2eq_100yr"] = cvt(masses[gas] * factors["100yr"][gas])
+            emissions[f"{gas}_co2eq_20yr"] = cvt(masses[gas] * factors["20yr"][gas])
 
-    emissions = totals["totals"]["emissions"]
+    return {"totals": {"emissions": emissions}}
 
-    co2e = list(filter(lambda x: x["gas_name"] == "co2e", records))
 
-    if (len(co2e) > 0):
-        val = str(int(round(float(co2e[0]["emissions_value"]))))
-        emissions["co2eq_100yr"] = val
-        emissions["co2eq_20yr"] = val
+# Extract the data of every source and sector/subsector of a country for a year
+async def db_query_inventory(country_code, year):
+    rows = []
+    async with AsyncSessionLocal() as session:
+        query = text(
+            """
+            SELECT source_name, "GPC_refno", gas_name, emissions_value FROM country_code
+            WHERE country_code = :country_code
+            AND year = :year;
+            """
+        )
+        params = {"country_code": country_code, "year": year}
+        result = await session.execute(query, params)
+        rows = [row._asdict() for row in result]
 
-    co2 = list(filter(lambda x: x["gas_name"] == "co2", records))
+    return rows
 
-    if (len(co2) > 0):
-        val = str(int(round(float(co2[0]["emissions_value"]))))
-        emissions["co2_mass"] = val
-        emissions["co2_co2eq"] = val
 
-    ch4 = list(filter(lambda x: x["gas_name"] == "ch4", records))
+async def inventory_totals(country_code, year, gwp=DEFAULT_GWP):
+    """totals payload for each (source_name, GPC_refno) with data for the country"""
+    grouped = group_by_key(
+        await db_query_inventory(country_code, year),
+        lambda row: (row["source_name"], row["GPC_refno"]),
+    )
 
-    if (len(ch4) > 0):
-        val = str(int(round(float(ch4[0]["emissions_value"]))))
-        emissions["ch4_mass"] = val
-        emissions["ch4_co2eq_100yr"] = str(int(round(float(ch4[0]["emissions_value"] * gas_to_gwp100["ch4"]))))
-        emissions["ch4_co2eq_20yr"] = str(int(round(float(ch4[0]["emissions_value"] * gas_to_gwp20["ch4"]))))
+    return {key: emissions_totals(rows, gwp) for key, rows in grouped.items()}
 
-    n2o = list(filter(lambda x: x["gas_name"] == "n2o", records))
 
-    if (len(n2o) > 0):
-        val = str(int(round(float(n2o[0]["emissions_value"]))))
-        emissions["n2o_mass"] = val
-        emissions["n2o_co2eq_100yr"] = str(int(round(float(n2o[0]["emissions_value"] * gas_to_gwp100["n2o"]))))
-        emissions["n2o_co2eq_20yr"] = str(int(round(float(n2o[0]["emissions_value"] * gas_to_gwp20["n2o"]))))
+@api_router.get("/source/{source_name}/country/{country_code}/{year}/{GPC_refno}")
+@cached
+async def get_emissions_by_country_and_year(
+    source_name: str, country_code: str, year: int, GPC_refno: str, gwp: GwpReport = DEFAULT_GWP
+):
+
+    records = await db_query(source_name, country_code, year, GPC_refno)
+
+    if not records:
+        raise HTTPException(status_code=404, detail="No data available")
 
-    return {**totals}
\ No newline at end of file
+    return emissions_totals(records, gwp)
\ No newline at end of file
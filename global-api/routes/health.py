@@ -1,30 +1,93 @@
-from contextlib import closing
-from db.database import engine
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+from db.database import async_engine, engine
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from settings import settings
 
 api_router = APIRouter()
 
+# result of the last database check, shared by the probes of an interval
+_readiness = {"result": None, "checked_at": None}
+_readiness_lock = asyncio.Lock()
+
+
+def pool_stats(pool):
+    """connections of a QueuePool: idle, in use and opened beyond pool_size"""
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+async def check_database():
+    """run `SELECT 1` within HEALTH_CHECK_TIMEOUT seconds; the time spent
+    waiting for a pooled connection is reported apart from the query"""
+    timings = {}
+
+    async def select_one():
+        start = time.perf_counter()
+        async with async_engine.connect() as connection:
+            timings["wait_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            start = time.perf_counter()
+            await connection.execute(text("SELECT 1"))
+            timings["query_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    try:
+        await asyncio.wait_for(select_one(), timeout=settings.HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"status": "unavailable", "error": "timeout", **timings}
+    except Exception as e:
+        return {"status": "unavailable", "error": type(e).__name__, **timings}
+
+    return {"status": "ok", **timings}
+
 
 @api_router.get("/health")
-def health_check():
+async def health_check():
     """
-    Check the health of the service by testing the database connection.
+    Liveness of the service: the process is up and serving requests.
+    The database is not queried, so a database outage does not restart the pods.
 
     Returns:
         dict: A dictionary containing the status of the service.
     """
-    try:
-        # Attempt to connect to the database using a context manager
-        with closing(engine.connect()):
-            return {'status': 'ok'}
-    except Exception as e:
-        raise HTTPException(status_code=503, detail="Service unavailable")
+    return {'status': 'ok'}
 
-    
-
-    
 
+@api_router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness of the service: the database answers `SELECT 1`.
 
+    The check runs at most once every HEALTH_CHECK_INTERVAL seconds and its
+    result is shared by the probes in between; the pool statistics are
+    current, so pool exhaustion shows before requests start failing.
 
+    Returns:
+        JSONResponse: the status, the last database check and the pools; 503
+        when the database is unavailable.
+    """
+    async with _readiness_lock:
+        now = time.monotonic()
+        checked_at = _readiness["checked_at"]
+        if checked_at is None or now - checked_at >= settings.HEALTH_CHECK_INTERVAL:
+            _readiness["result"] = await check_database()
+            _readiness["checked_at"] = now
+        database = _readiness["result"]
 
+    content = {
+        "status": database["status"],
+        "database": database,
+        "pools": {
+            "async": pool_stats(async_engine.pool),
+            "sync": pool_stats(engine.pool),
+        },
+    }
 
+    return JSONResponse(
+        content=content, status_code=200 if database["status"] == "ok" else 503
+    )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils.metrics import query_latency
+
+api_router = APIRouter()
+
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """query latency histograms by route, in the Prometheus text format"""
+    return PlainTextResponse(
+        query_latency.render(), media_type="text/plain; version=0.0.4"
+    )
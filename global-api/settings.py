@@ -10,6 +10,34 @@ class Settings(BaseSettings):
     DB_HOST: str
     DB_PORT: int
 
+    # FastAPI debug mode (tracebacks in error responses); development only
+    DEBUG: bool = False
+
+    # connection pool of each database engine (sync and async)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # log every SQL statement (development only)
+    DB_ECHO: bool = False
+
+    # readiness probe: seconds between database checks and their timeout
+    HEALTH_CHECK_INTERVAL: int = 5
+    HEALTH_CHECK_TIMEOUT: float = 2.0
+
+    LOG_LEVEL: str = "INFO"
+    # fraction of queries whose timing is logged as a JSON line
+    QUERY_LOG_SAMPLE_RATE: float = 0.0
+
+    # responses larger than this (bytes) are brotli or gzip compressed
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # in-process response cache for the emission endpoints
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL: int = 3600
+    # how often (seconds) to re-check the catalogue last-update for changes
+    DATA_VERSION_TTL: int = 30
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,79 @@
+import asyncio
+from unittest import mock
+
+from utils import cache
+from utils.cache import TTLCache, cached
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    lru = TTLCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == (True, 1)
+    lru.set("c", 3)
+
+    assert lru.get("b") == (False, None)
+    assert lru.get("a") == (True, 1)
+    assert lru.stats()["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    timer = FakeTimer()
+    lru = TTLCache(maxsize=2, ttl=10, timer=timer)
+    lru.set("a", 1)
+    timer.now = 11
+
+    assert lru.get("a") == (False, None)
+
+
+def test_cached_route_hits_until_data_version_changes():
+    calls = []
+
+    @cached
+    async def route(locode: str, year: int):
+        calls.append((locode, year))
+        return {"locode": locode, "year": year}
+
+    cache.response_cache.clear()
+    cache._data_version.update(value=None, checked_at=None)
+
+    with mock.patch.object(cache.settings, "DATA_VERSION_TTL", 0), mock.patch(
+        "routes.catalogue_last_update_endpoint.db_query", side_effect=[1, 1, 2]
+    ):
+        request = lambda: asyncio.run(route(locode="US NYC", year=2022))
+        assert request() == {"locode": "US NYC", "year": 2022}
+        assert request() == {"locode": "US NYC", "year": 2022}
+        assert len(calls) == 1
+
+        request()
+        assert len(calls) == 2
+
+
+def test_cached_route_served_when_data_version_fails():
+    calls = []
+
+    @cached
+    async def route(locode: str):
+        calls.append(locode)
+        return {"locode": locode}
+
+    cache.response_cache.clear()
+    cache._data_version.update(value=None, checked_at=None)
+
+    with mock.patch.object(cache.settings, "DATA_VERSION_TTL", 0), mock.patch(
+        "routes.catalogue_last_update_endpoint.db_query", side_effect=[1, OSError("down")]
+    ):
+        request = lambda: asyncio.run(route(locode="US NYC"))
+        assert request() == {"locode": "US NYC"}
+        assert request() == {"locode": "US NYC"}
+        assert len(calls) == 1
+
+    cache._data_version.update(value=None, checked_at=None)
@@ -0,0 +1,74 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from main import app
+from models.datasource import Datasource
+from routes import catalogue_endpoint
+from routes.catalogue_endpoint import CATALOGUE_FIELDS, render_json
+
+client = TestClient(app)
+
+
+def datasource(datasource_id, gpc_reference_number, retrieval_method):
+    values = {name: None for name in CATALOGUE_FIELDS}
+    values.update(
+        datasource_id=datasource_id,
+        gpc_reference_number=gpc_reference_number,
+        retrieval_method=retrieval_method,
+        start_year=2019,
+        modified_date=datetime(2024, 3, 1, 12, 30),
+        datasource_name="Näme",
+    )
+    return values
+
+
+RECORDS = [
+    datasource("a", "II.1.1", "global_api"),
+    datasource("b", "I.1.1", "global_api_downscaled_by_population"),
+    datasource("c", "I.1.1", "manual"),
+]
+
+
+def columns():
+    return {name: [record[name] for record in RECORDS] for name in CATALOGUE_FIELDS}
+
+
+def test_json_render_matches_orm_serialization():
+    orm = [Datasource(**record) for record in RECORDS]
+    expected = JSONResponse(jsonable_encoder({"datasources": orm})).body
+
+    assert render_json(columns(), CATALOGUE_FIELDS, range(len(RECORDS))) == expected
+
+
+def test_catalogue_fields_and_filters():
+    catalogue_endpoint._catalogue.update(version=None, columns=None)
+    rows = [SimpleNamespace(**record) for record in RECORDS]
+
+    with patch("utils.etag.data_version", return_value=1), patch(
+        "routes.catalogue_endpoint.data_version", return_value=1
+    ), patch("routes.catalogue_endpoint.db_query", return_value=rows) as db_query:
+        response = client.get(
+            "/api/v0/catalogue?fields=datasource_id,retrieval_method"
+            "&retrieval_method=global_api,global_api_downscaled_by_population"
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "datasources": [
+                {"datasource_id": "a", "retrieval_method": "global_api"},
+                {
+                    "datasource_id": "b",
+                    "retrieval_method": "global_api_downscaled_by_population",
+                },
+            ]
+        }
+
+        response = client.get("/api/v0/catalogue?format=csv&fields=datasource_id&gpc_reference_number=I.1.1")
+        assert response.text.splitlines() == ["datasource_id", "b", "c"]
+
+        assert client.get("/api/v0/catalogue?fields=nope").status_code == 400
+        assert db_query.call_count == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from utils.emissions import GWP, GwpReport, co2eq_totals, gwp_factors
+
+
+def test_co2eq_totals_ar6():
+    co2eq = co2eq_totals({"CO2": 1000, "CH4": 10, "N2O": 1})
+
+    assert co2eq["co2_co2eq"] == 1000
+    assert co2eq["ch4_co2eq_100yr"] == pytest.approx(298)
+    assert co2eq["ch4_co2eq_20yr"] == pytest.approx(825)
+    assert co2eq["n2o_co2eq_100yr"] == 273
+    assert co2eq["co2eq_100yr"] == pytest.approx(1571)
+    assert co2eq["co2eq_20yr"] == pytest.approx(2098)
+
+
+@pytest.mark.parametrize("report", list(GwpReport))
+def test_co2eq_totals_every_report(report):
+    masses = {"co2": 3.0, "ch4": 2.0, "n2o": 5.0}
+    co2eq = co2eq_totals(masses, report.value)
+
+    for horizon, factors in GWP[report].items():
+        expected = sum(mass * factor for mass, factor in zip(masses.values(), factors))
+        assert co2eq[f"co2eq_{horizon}"] == pytest.approx(expected)
+
+
+def test_missing_gases_count_as_zero():
+    co2eq = co2eq_totals({"ch4": 1}, "AR5")
+
+    assert co2eq["co2_co2eq"] == 0
+    assert co2eq["n2o_co2eq_100yr"] == 0
+    assert co2eq["co2eq_100yr"] == gwp_factors("AR5")["100yr"]["ch4"]
+
+
+def test_unknown_report():
+    with pytest.raises(ValueError):
+        gwp_factors("AR3")
@@ -1,4 +1,8 @@
 import pytest
+import uuid
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from main import app
 
@@ -17,8 +21,263 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json() == {'status': 'ok'}
 
+# Test readiness reuses its database check between probes and reports the pools
+def test_readiness_check():
+    from routes import health
+
+    health._readiness.update(result=None, checked_at=None)
+    result = {"status": "unavailable", "error": "OSError"}
+    with patch("routes.health.check_database", return_value=result) as check_database:
+        first = client.get("/health/ready")
+        second = client.get("/health/ready")
+
+    assert first.status_code == second.status_code == 503
+    assert first.json()["database"] == result
+    assert set(first.json()["pools"]["async"]) == {"size", "checked_in", "checked_out", "overflow"}
+    assert check_database.call_count == 1
+
 # Test the data catalogue end point has no data
 def test_catalgue_no_data_available():
     response = client.get("/api/v0/catalogue")
     assert response.status_code == 404
-    assert response.json() == {"detail": "No data available"}
\ No newline at end of file
+    assert response.json() == {"detail": "No data available"}
+
+# Test repeat fetches are answered with 304 without running the route
+def test_etag_not_modified():
+    with patch("utils.etag.data_version", return_value=1700000000), patch(
+        "routes.catalogue_last_update_endpoint.db_query", return_value=1700000000
+    ) as db_query:
+        response = client.get("/api/v0/catalogue/last-update")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+
+        response = client.get(
+            "/api/v0/catalogue/last-update", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert db_query.call_count == 1
+
+# Test a 304 answered by the ETag middleware still carries the CORS headers
+def test_etag_not_modified_cors():
+    origin = {"Origin": "https://example.org"}
+    with patch("utils.etag.data_version", return_value=1700000000), patch(
+        "routes.catalogue_last_update_endpoint.db_query", return_value=1700000000
+    ):
+        response = client.get("/api/v0/catalogue/last-update", headers=origin)
+        etag = response.headers["etag"]
+
+        response = client.get(
+            "/api/v0/catalogue/last-update", headers={**origin, "If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert response.headers["access-control-allow-origin"] == "*"
+
+# Test a failing data version check serves the route without an ETag
+def test_etag_data_version_unavailable():
+    with patch("utils.etag.data_version", side_effect=OSError("down")), patch(
+        "routes.catalogue_last_update_endpoint.db_query", return_value=1700000000
+    ):
+        response = client.get("/api/v0/catalogue/last-update")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+# Test batch results come back in request order with per-entry status
+def test_emissions_batch():
+    totals = {("US NYC", 2022, "II.1.1"): {"totals": {"emissions": {}}}}
+    with patch.dict(
+        "routes.batch_endpoint.batch_sources", {"edgar": AsyncMock(return_value=totals)}
+    ):
+        response = client.post(
+            "/api/v0/emissions/batch",
+            json={
+                "queries": [
+                    {"source": "edgar", "locode": "US NYC", "year": 2021, "gpcReferenceNumber": "II.1.1"},
+                    {"source": "edgar", "locode": "US NYC", "year": 2022, "gpcReferenceNumber": "II.1.1"},
+                ]
+            },
+        )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [404, 200]
+    assert results[1]["data"] == {"totals": {"emissions": {}}}
+
+# Test the metrics endpoint serves the Prometheus text format
+def test_metrics():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE db_query_duration_seconds histogram" in response.text
+
+# Test the precomputed GeoJSON boundary is served compressed
+def test_city_boundary_geojson():
+    geojson = '{"type":"Polygon","coordinates":[[' + ",".join(["[0.123456789,1.123456789]"] * 200) + "]]}"
+    boundary = SimpleNamespace(
+        geometry="POLYGON ((...))",
+        geojson=geojson,
+        bbox_north=1.0,
+        bbox_south=0.0,
+        bbox_east=1.0,
+        bbox_west=0.0,
+    )
+    with patch("routes.city_boundaries_endpoint.db_query_boundary", return_value=boundary) as db_query:
+        response = client.get(
+            "/api/v0/cityboundary/city/AA AAA?format=geojson&tolerance=0.001",
+            headers={"Accept-Encoding": "br"},
+        )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+    assert response.json()["city_geometry"]["type"] == "Polygon"
+    assert response.json()["bbox_north"] == 1.0
+    db_query.assert_called_once_with("AA AAA", 0.001)
+
+# Test a tolerance that is not precomputed is rejected rather than not found
+def test_city_boundary_unknown_tolerance():
+    with patch("routes.city_boundaries_endpoint.db_query_boundary") as db_query:
+        response = client.get("/api/v0/cityboundary/city/AA AAA?format=geojson&tolerance=0.0005")
+    assert response.status_code == 400
+    assert "0.0001" in response.json()["detail"]
+    db_query.assert_not_called()
+
+# Test the inventory merges the sources by GPC refno and reports failures
+def test_city_inventory():
+    payload = {"totals": {"emissions": {}}}
+    sources = {
+        "climatetrace": AsyncMock(return_value={"II.1.1": payload}),
+        "crosswalk": AsyncMock(return_value={}),
+        "edgar": AsyncMock(return_value={"II.1.1": payload, "I.1.1": payload}),
+        "ghgrp_epa": AsyncMock(side_effect=RuntimeError("down")),
+    }
+    with patch("utils.etag.data_version", return_value=1700000000), patch(
+        "utils.cache.data_version", return_value=None
+    ), patch.dict("routes.city_inventory_endpoint.city_sources", sources), patch(
+        "routes.citywide_emission_endpoint.inventory_totals",
+        return_value={("UNFCCC", "I.1.1"): payload},
+    ), patch(
+        "routes.country_code_endpoint.inventory_totals",
+        return_value={("UNFCCC", "I.1.1"): {"totals": {}}},
+    ) as country:
+        response = client.get("/api/v0/city/US NYC/2022/inventory")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inventory"] == {
+        "I.1.1": {
+            "city": {"edgar": payload},
+            "citywide": {"UNFCCC": payload},
+            "country": {"UNFCCC": {"totals": {}}},
+        },
+        "II.1.1": {"city": {"climatetrace": payload, "edgar": payload}},
+    }
+    assert body["unavailable_sources"] == ["ghgrp_epa"]
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+    country.assert_called_once_with("US", 2022, "AR6")
+
+# Test the gwp parameter selects the assessment report of the CO2 equivalents
+def test_edgar_gwp():
+    records = [("CO2", 1000.0), ("CH4", 10.0), ("N2O", 1.0)]
+    with patch("utils.etag.data_version", return_value=None), patch(
+        "utils.cache.data_version", return_value=None
+    ), patch("routes.city_locode_endpoint_edgar.db_query", return_value=records):
+        ar6 = client.get("/api/v0/edgar/city/US NYC/2022/II.1.1").json()
+        ar5 = client.get("/api/v0/edgar/city/US NYC/2022/II.1.1?gwp=AR5").json()
+        invalid = client.get("/api/v0/edgar/city/US NYC/2022/II.1.1?gwp=AR3")
+
+    assert ar6["totals"]["emissions"]["co2eq_100yr"] == "1571"
+    assert ar5["totals"]["emissions"]["co2eq_100yr"] == "1545"
+    assert ar5["totals"]["emissions"]["ch4_co2eq_20yr"] == "840"
+    assert invalid.status_code == 422
+
+# Test live EDGAR totals bypass the response cache and the ETag
+def test_edgar_live_not_cached():
+    records = [("CO2", 1000.0)]
+    with patch("utils.etag.data_version", return_value=1700000000), patch(
+        "utils.cache.data_version", return_value=1700000000
+    ), patch(
+        "routes.city_locode_endpoint_edgar.db_query_live", return_value=records
+    ) as db_query_live:
+        first = client.get("/api/v0/edgar/city/US NYC/2022/II.1.1?live=true")
+        second = client.get("/api/v0/edgar/city/US NYC/2022/II.1.1?live=true")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["totals"]["emissions"]["co2_mass"] == "1000"
+    assert first.headers["cache-control"] == "no-store"
+    assert "etag" not in first.headers
+    assert db_query_live.call_count == 2
+
+# Test the country totals pivot the text emissions values per gas
+def test_country_totals():
+    records = [
+        {"gas_name": "co2e", "emissions_value": "1571.2"},
+        {"gas_name": "co2", "emissions_value": "1000"},
+        {"gas_name": "ch4", "emissions_value": "10"},
+        {"gas_name": "n2o", "emissions_value": "1"},
+        {"gas_name": "n2o", "emissions_value": "not reported"},
+        {"gas_name": "hfc", "emissions_value": "not reported"},
+    ]
+    with patch("utils.etag.data_version", return_value=None), patch(
+        "utils.cache.data_version", return_value=None
+    ), patch("routes.country_code_endpoint.db_query", return_value=records):
+        response = client.get("/api/v0/source/UNFCCC/country/US/2022/I.1.1")
+
+    assert response.status_code == 200
+    emissions = response.json()["totals"]["emissions"]
+    assert emissions["co2eq_100yr"] == "1571"
+    assert emissions["co2_co2eq"] == "1000"
+    assert emissions["ch4_co2eq_100yr"] == "298"
+    assert emissions["n2o_co2eq_20yr"] == "273"
+
+# Test following next_cursor past a full last page returns an empty page
+def test_points_pages_end_on_empty_page():
+    Asset = namedtuple(
+        "Asset",
+        [
+            "id", "gas", "emissions_quantity", "asset_name", "asset_id",
+            "capacity_units", "activity_units", "emissions_factor_units",
+            "emissions_quantity_units", "lat", "lon", "capacity",
+            "capacity_factor", "activity", "emissions_factor",
+        ],
+    )
+    ids = [uuid.UUID(int=1), uuid.UUID(int=2)]
+    page = [
+        Asset(id, "co2", 10.0, "asset", 1, "t", "t", "t", "kg", 1.0, 2.0, 3.0, None, 4.0, 5.0)
+        for id in ids
+    ]
+    with patch("utils.etag.data_version", return_value=None), patch(
+        "utils.cache.data_version", return_value=None
+    ), patch(
+        "routes.city_locode_endpoint.db_query_totals", return_value=[("co2", 20)]
+    ), patch(
+        "routes.city_locode_endpoint.db_query", side_effect=[page, []]
+    ):
+        url = "/api/v0/climatetrace/city/US NYC/2022/II.1.1?limit=2"
+        first = client.get(url).json()
+        last = client.get(f"{url}&cursor={first['next_cursor']}")
+
+    assert len(first["points"]) == 2
+    assert first["next_cursor"] == str(ids[-1])
+    assert last.status_code == 200
+    assert last.json()["points"] == []
+    assert last.json()["next_cursor"] is None
+
+# Test an empty GHGRP page and invalid cursors and formats of the points routes
+def test_points_empty_page_and_invalid_parameters():
+    summary = SimpleNamespace(facilities=1, emissions_quantity=10.0)
+    with patch("utils.etag.data_version", return_value=None), patch(
+        "utils.cache.data_version", return_value=None
+    ), patch(
+        "routes.city_locode_endpoint_ghgrp.db_query_totals", return_value=summary
+    ), patch(
+        "routes.city_locode_endpoint_ghgrp.db_query", return_value=[]
+    ):
+        url = "/api/v0/ghgrp_epa/city/US NYC/2022/I.1.1?limit=10"
+        empty = client.get(f"{url}&cursor={uuid.UUID(int=3)}")
+        bad_cursor = client.get(f"{url}&cursor=not-a-uuid")
+        bad_format = client.get(f"{url}&format=xml")
+
+    assert empty.status_code == 200
+    assert empty.json()["points"] == []
+    assert empty.json()["next_cursor"] is None
+    assert bad_cursor.status_code == 422
+    assert bad_format.status_code == 422
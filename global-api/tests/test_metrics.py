@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, text
+
+from utils.metrics import Histogram, current_route, instrument_engine, query_latency
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "test", "route", buckets=(0.1, 1.0))
+    histogram.observe("/a", 0.05)
+    histogram.observe("/a", 0.5)
+
+    lines = histogram.render().splitlines()
+
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{route="/a"} 2' in lines
+
+
+def test_queries_are_timed_by_route():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    query_latency.clear()
+
+    token = current_route.set("/api/v0/test/{locode}")
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        current_route.reset(token)
+
+    assert 'db_query_duration_seconds_count{route="/api/v0/test/{locode}"} 1' in (
+        query_latency.render().splitlines()
+    )
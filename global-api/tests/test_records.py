@@ -0,0 +1,35 @@
+import math
+from collections import namedtuple
+
+import pandas as pd
+import pytest
+
+from utils.records import format_cell, records_to_columns
+
+Row = namedtuple("Row", ["gas", "asset_id", "capacity", "capacity_factor", "lat"])
+
+
+# format_cell must render exactly what a one-row frame's `to_string` did
+@pytest.mark.parametrize(
+    "value",
+    [0.0, -1.5, 1e-7, 123456789.123456789, 1e20, float("inf"), 3, -7, None, math.nan],
+)
+def test_format_cell_matches_pandas(value):
+    row = pd.DataFrame([{"value": value, "gas": "co2"}]).iloc[0].to_frame().T
+    expected = row["value"].to_string(index=False, header=False).strip()
+    assert format_cell(row["value"].item()) == expected
+
+
+def test_records_to_columns_matches_dataframe_dtypes():
+    records = [
+        Row("co2", 1, 10, None, 1.5),
+        Row("ch4", None, 2.5, None, -3.0),
+    ]
+
+    columns = records_to_columns(records)
+    df = pd.DataFrame(records)
+
+    for name in Row._fields:
+        assert [format_cell(v) for v in columns[name]] == [
+            format_cell(v) for v in df[name].tolist()
+        ]
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import shapely
+from fastapi.testclient import TestClient
+
+from main import app
+from utils.spatial_index import CityIndex
+
+client = TestClient(app)
+
+
+def square(x, y, size):
+    return shapely.box(x, y, x + size, y + size)
+
+
+def test_city_index_locates_containing_cities():
+    index = CityIndex(
+        ["AA AAA", "BB BBB", "CC CCC", "DD DDD"],
+        [square(0, 0, 10), square(5, 5, 10), square(20, 20, 1), None],
+    )
+
+    assert len(index) == 3
+    assert index.locate(6, 6) == ["AA AAA", "BB BBB"]
+    assert index.locate(1, 1) == ["AA AAA"]
+    assert index.locate(30, 30) == []
+    assert index.locate_many([6, 30, 1], [6, 30, 1]) == [
+        ["AA AAA", "BB BBB"],
+        [],
+        ["AA AAA"],
+    ]
+
+
+def test_locode_lookup_uses_the_index():
+    index = CityIndex(["AA AAA"], [square(0, 0, 10)])
+
+    with patch("routes.city_boundaries_endpoint.current_city_index", return_value=index):
+        response = client.get("/api/v0/cityboundary/locode/5/5")
+
+    assert response.status_code == 200
+    assert response.json() == {"locodes": ["AA AAA"]}
+
+
+def test_bulk_locode_lookup_keeps_request_order():
+    index = CityIndex(["AA AAA", "BB BBB"], [square(0, 0, 10), square(20, 20, 10)])
+
+    with patch("routes.city_boundaries_endpoint.current_city_index", return_value=index):
+        response = client.post(
+            "/api/v0/cityboundary/locode",
+            json={"points": [{"lat": 25, "lon": 25}, {"lat": 50, "lon": 50}, {"lat": 5, "lon": 5}]},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"locodes": [["BB BBB"], [], ["AA AAA"]]}
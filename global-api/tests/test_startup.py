@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# cumulative `import main` time allowed, well above a typical local run (~1s)
+IMPORT_TIME_BUDGET_SECONDS = 3.0
+
+# process start to the first /health answer, startup hooks included
+READY_TIME_BUDGET_SECONDS = 5.0
+
+# libraries that must not be loaded just by starting the API
+HEAVY_MODULES = [
+    "pandas",
+    "geopandas",
+    "numpy",
+    "shapely",
+    "scipy",
+    "xarray",
+    "rioxarray",
+    "osmnx",
+]
+
+
+# time a fresh worker takes to start the app and answer its first request
+READY_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+import main
+with TestClient(main.app) as client:
+    status = client.get("/health").status_code
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "status": status,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def run_python(args):
+    """run the interpreter in the API directory with placeholder settings"""
+    env = dict(os.environ)
+    for key in ["PROJECT_NAME", "DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST"]:
+        env.setdefault(key, "startup")
+    env.setdefault("DB_PORT", "5432")
+
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_times():
+    """{module: cumulative microseconds} from `python -X importtime -c "import main"`"""
+    result = run_python(["-X", "importtime", "-c", "import main"])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_startup_import_budget():
+    times = import_times()
+
+    assert not [name for name in HEAVY_MODULES if name in times]
+    assert times["main"] / 1e6 < IMPORT_TIME_BUDGET_SECONDS
+
+
+def test_startup_time_to_ready():
+    ready = json.loads(run_python(["-c", READY_SCRIPT]).stdout.splitlines()[-1])
+
+    assert ready["status"] == 200
+    assert not [name for name in HEAVY_MODULES if name in ready["modules"]]
+    assert ready["seconds"] < READY_TIME_BUDGET_SECONDS
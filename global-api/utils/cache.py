@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from starlette.responses import Response
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """return (True, value) on a hit and (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self.timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = TTLCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL)
+
+_data_version = {"value": None, "checked_at": None}
+_data_version_lock = asyncio.Lock()
+
+
+async def data_version():
+    """epoch of the latest datasource update, as served by /catalogue/last-update
+
+    The value is re-read from the database at most once every
+    DATA_VERSION_TTL seconds; when it changes the response cache is
+    dropped, since every cached payload was computed from older data.
+    """
+    from routes.catalogue_last_update_endpoint import db_query
+
+    async with _data_version_lock:
+        now = time.monotonic()
+        checked_at = _data_version["checked_at"]
+        if checked_at is None or now - checked_at >= settings.DATA_VERSION_TTL:
+            version = await db_query()
+            if version != _data_version["value"]:
+                response_cache.clear()
+            _data_version["value"] = version
+            _data_version["checked_at"] = now
+        return _data_version["value"]
+
+
+def cached(route):
+    """cache the return value of an async route handler keyed by its parameters
+
+    Only plain payloads are cached; errors and streaming responses are
+    passed through untouched.
+    """
+    name = f"{route.__module__}.{route.__qualname__}"
+
+    @wraps(route)
+    async def wrapper(*args, **kwargs):
+        try:
+            await data_version()
+        except Exception as e:
+            # keep serving the cached payloads until the version can be read
+            logger.error(f"Data version unavailable: {e!r}")
+
+        key = (name, args, tuple(sorted(kwargs.items())))
+        hit, value = response_cache.get(key)
+        if hit:
+            return value
+
+        value = await route(*args, **kwargs)
+        if not isinstance(value, Response):
+            response_cache.set(key, value)
+        return value
+
+    return wrapper
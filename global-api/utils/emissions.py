@@ -0,0 +1,57 @@
+from enum import Enum
+
+
+class GwpReport(str, Enum):
+    """IPCC assessment report the global warming potentials are taken from"""
+
+    AR4 = "AR4"
+    AR5 = "AR5"
+    AR6 = "AR6"
+
+
+DEFAULT_GWP = GwpReport.AR6
+
+GASES = ("co2", "ch4", "n2o")
+HORIZONS = ("100yr", "20yr")
+
+# global warming potentials of (co2, ch4, n2o) per report and time horizon;
+# AR6 methane is the fossil value
+GWP = {
+    GwpReport.AR4: {"100yr": (1, 25, 298), "20yr": (1, 72, 289)},
+    GwpReport.AR5: {"100yr": (1, 28, 265), "20yr": (1, 84, 264)},
+    GwpReport.AR6: {"100yr": (1, 29.8, 273), "20yr": (1, 82.5, 273)},
+}
+
+_factors = {
+    report: {horizon: dict(zip(GASES, values)) for horizon, values in horizons.items()}
+    for report, horizons in GWP.items()
+}
+
+
+def gwp_factors(gwp=DEFAULT_GWP):
+    """{horizon: {gas: GWP}} of the report, with lower-case gas names"""
+    return _factors[GwpReport(gwp)]
+
+
+def co2eq_totals(masses, gwp=DEFAULT_GWP):
+    """CO2 equivalents of the summed mass per gas
+
+    `masses` maps gas names (any case) to masses; missing gases count as 0.
+    Returns the co2eq of each gas and the multi-gas totals, keyed as in the
+    totals payloads (co2_co2eq, ch4_co2eq_100yr, ..., co2eq_20yr).
+    """
+    masses = {gas.lower(): mass for gas, mass in masses.items()}
+    factors = gwp_factors(gwp)
+
+    result = {"co2_co2eq": masses.get("co2", 0)}
+
+    for horizon in HORIZONS:
+        total = 0
+        for gas in GASES:
+            value = masses.get(gas, 0) * factors[horizon][gas]
+            if gas != "co2":
+                result[f"{gas}_co2eq_{horizon}"] = value
+            total += value
+        result[f"co2eq_{horizon}"] = total
+
+    return result
@@ -0,0 +1,72 @@
+import hashlib
+import logging
+from fastapi import Request
+from starlette.responses import Response
+from utils.cache import data_version
+
+logger = logging.getLogger(__name__)
+
+# paths whose payload does not follow the datasource catalogue version
+ETAG_EXCLUDED_PREFIXES = ("/api/v0/cityboundary", "/api/v0/cache")
+
+
+def make_etag(version, request):
+    """weak ETag from the data version and the full request path
+
+    The tag is weak because the compression middleware serves the same
+    payload as brotli, gzip or identity bodies, which are not byte-equal.
+    """
+    key = f"{version}:{request.url.path}?{request.url.query}"
+    return 'W/"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(etag, if_none_match):
+    """true if the If-None-Match header lists this ETag (or is a wildcard),
+    using the weak comparison of If-None-Match"""
+    opaque = etag.removeprefix("W/")
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == opaque for candidate in candidates
+    )
+
+
+async def conditional_request_middleware(request: Request, call_next):
+    """answer repeat fetches with 304 Not Modified while the data is unchanged
+
+    The check only reads the cached catalogue version, so a matching
+    request never reaches the emissions tables.
+    """
+    if request.method not in ("GET", "HEAD") or not request.url.path.startswith(
+        "/api/v0"
+    ):
+        return await call_next(request)
+
+    if request.url.path.startswith(ETAG_EXCLUDED_PREFIXES):
+        return await call_next(request)
+
+    try:
+        version = await data_version()
+    except Exception as e:
+        # the route may still be served, e.g. from the response cache
+        logger.error(f"Data version unavailable, no ETag: {e!r}")
+        return await call_next(request)
+
+    if version is None:
+        return await call_next(request)
+
+    etag = make_etag(version, request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+
+    # no-store responses (e.g. a partial city inventory) must not be revalidated
+    if response.status_code == 200 and "no-store" not in response.headers.get(
+        "cache-control", ""
+    ):
+        response.headers.update(headers)
+
+    return response
@@ -1,4 +1,7 @@
+import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 
 def get_or_create_log_file(file_path):
@@ -17,3 +20,21 @@ def get_or_create_log_file(file_path):
         pass  # Creates an empty file
 
     return new_file_path
+
+
+def start_queue_logging(file_path, level, format, datefmt):
+    """log through a queue so that request handlers never block on file I/O
+
+    The root logger only enqueues records; a listener thread writes them to
+    `file_path`. Stop the returned listener on shutdown to flush the queue.
+    """
+    log_queue = queue.SimpleQueue()
+
+    file_handler = logging.FileHandler(file_path, encoding="utf-8")
+    file_handler.setFormatter(logging.Formatter(format, datefmt))
+
+    logging.basicConfig(level=level, handlers=[QueueHandler(log_queue)], force=True)
+
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
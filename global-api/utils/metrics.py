@@ -0,0 +1,124 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from fastapi import Request
+from sqlalchemy import event
+from starlette.routing import Match
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# route template of the request being served, e.g. /api/v0/edgar/city/{locode}/...
+current_route = ContextVar("current_route", default="none")
+
+# upper bounds (seconds) of the latency buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative latency histogram per label value, rendered in the
+    Prometheus text exposition format"""
+
+    def __init__(self, name, help, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+
+        with self._lock:
+            for label_value, series in sorted(self._series.items()):
+                label = f'{self.label}="{escape_label(label_value)}"'
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{label}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{label}}} {series['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+query_latency = Histogram(
+    "db_query_duration_seconds",
+    "Latency of the database queries run while serving each route",
+    "route",
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+    route = current_route.get()
+
+    query_latency.observe(route, seconds)
+
+    if settings.QUERY_LOG_SAMPLE_RATE and random.random() < settings.QUERY_LOG_SAMPLE_RATE:
+        logger.info(
+            json.dumps(
+                {
+                    "event": "query",
+                    "route": route,
+                    "duration_ms": round(seconds * 1000, 3),
+                    "statement": " ".join(statement.split())[:500],
+                }
+            )
+        )
+
+
+def instrument_engine(engine):
+    """time every query run through the (sync) engine; pass
+    `async_engine.sync_engine` for an async one"""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def route_template(request):
+    """path template of the route matching the request, so that the label
+    values stay bounded whatever the path parameters are"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+async def route_context_middleware(request: Request, call_next):
+    """label the queries run while serving the request with its route"""
+    token = current_route.set(route_template(request))
+    try:
+        return await call_next(request)
+    finally:
+        current_route.reset(token)
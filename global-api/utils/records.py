@@ -0,0 +1,126 @@
+import json
+import math
+from enum import Enum
+from fastapi.responses import StreamingResponse
+from db.database import SessionLocal
+
+# number of rows pulled from the server-side cursor at a time
+STREAM_CHUNK_SIZE = 1000
+
+# upper bound for the `limit` query parameter of paginated endpoints
+MAX_PAGE_SIZE = 10000
+
+
+class PointsFormat(str, Enum):
+    """alternative body formats of the endpoints returning points"""
+
+    ndjson = "ndjson"
+
+
+def format_cell(value):
+    """format a value the way pandas renders a single object cell with
+    `to_string(index=False, header=False)`"""
+    if value is None:
+        return "None"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        text = f"{value: .6f}".rstrip("0")
+        if text.endswith("."):
+            text += "0"
+        return text.strip()
+    if isinstance(value, int):
+        return str(value)
+    # other types are rare here (numeric columns); only then is pandas loaded
+    import pandas as pd
+
+    return pd.Series([value], dtype=object).to_string(index=False, header=False).strip()
+
+
+def coerce_numeric(values):
+    """promote a numeric column the way `pd.DataFrame` infers its dtype:
+    nulls in a numeric column become NaN and mixed ints/floats become floats"""
+    numbers = [value for value in values if value is not None]
+
+    if not numbers or not all(
+        isinstance(value, int | float) and not isinstance(value, bool)
+        for value in numbers
+    ):
+        return values
+
+    if len(numbers) == len(values) and all(isinstance(value, int) for value in numbers):
+        return values
+
+    return [math.nan if value is None else float(value) for value in values]
+
+
+def records_to_columns(records):
+    """split the fetched rows into a dict of column lists"""
+    if not records:
+        return {}
+
+    return {
+        name: coerce_numeric(list(values))
+        for name, values in zip(records[0]._fields, zip(*records))
+    }
+
+
+def next_cursor(records, limit):
+    """id of the last row when the page is full, None on the last page"""
+    if limit is None or len(records) < limit:
+        return None
+    return str(records[-1].id)
+
+
+def stream_records(query, params, chunk_size=STREAM_CHUNK_SIZE):
+    """yield chunks of rows from a server-side cursor so that memory stays
+    flat regardless of the size of the result"""
+    with SessionLocal() as session:
+        result = session.execute(
+            query.execution_options(stream_results=True, yield_per=chunk_size),
+            params,
+        )
+        for partition in result.partitions():
+            yield partition
+
+
+def ndjson_response(header, chunks, to_points):
+    """stream the header object followed by one point per line"""
+
+    def lines():
+        yield json.dumps(header) + "\n"
+        for chunk in chunks:
+            for point in to_points(records_to_columns(chunk)):
+                yield json.dumps(point) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def values_list(keys, types=None):
+    """render key tuples as bound SQL rows, `(:k0_0, :k0_1), (:k1_0, :k1_1)`,
+    for set-based lookups like `WHERE (a, b) IN (...)`
+
+    `types` casts each column, e.g. `("text", "integer")`; needed for a
+    `VALUES` list, where the parameters are not compared against a column
+    the database could infer their type from."""
+    rows = []
+    params = {}
+    for i, key in enumerate(keys):
+        names = []
+        for j, value in enumerate(key):
+            name = f"k{i}_{j}"
+            params[name] = value
+            if types is None:
+                names.append(f":{name}")
+            else:
+                names.append(f"CAST(:{name} AS {types[j]})")
+        rows.append("(" + ", ".join(names) + ")")
+    return ", ".join(rows), params
+
+
+def group_by_key(records, key):
+    """group rows into a dict of lists by `key(row)`"""
+    grouped = {}
+    for record in records:
+        grouped.setdefault(key(record), []).append(record)
+    return grouped
@@ -0,0 +1,106 @@
+import logging
+import threading
+from sqlalchemy import text
+from db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class CityIndex:
+    """STRtree over the prepared city polygons, keyed by locode"""
+
+    def __init__(self, locodes, geometries):
+        # numpy and shapely load with the first index, not with the app
+        import numpy as np
+        import shapely
+
+        geometries = np.asarray(geometries, dtype=object)
+        valid = ~shapely.is_missing(geometries)
+
+        self.locodes = np.asarray(locodes, dtype=object)[valid]
+        self.geometries = geometries[valid]
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.locodes)
+
+    def locate(self, lon, lat):
+        """locodes of the cities containing the point, in load order"""
+        import numpy as np
+        import shapely
+
+        candidates = np.sort(self.tree.query(shapely.Point(lon, lat)))
+        inside = shapely.contains_xy(self.geometries[candidates], lon, lat)
+        return self.locodes[candidates[inside]].tolist()
+
+    def locate_many(self, lons, lats):
+        """locodes of the cities containing each point, in one vectorized
+        pass over the tree; one list per point, in input order"""
+        import numpy as np
+        import shapely
+
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+
+        # (point, polygon) pairs whose extents intersect, ordered by point then polygon
+        points, candidates = self.tree.query(shapely.points(lons, lats))
+        order = np.lexsort((candidates, points))
+        points, candidates = points[order], candidates[order]
+
+        inside = shapely.contains_xy(
+            self.geometries[candidates], lons[points], lats[points]
+        )
+
+        results = [[] for _ in range(len(lons))]
+        for point, locode in zip(points[inside], self.locodes[candidates[inside]]):
+            results[point].append(locode)
+        return results
+
+
+def load_city_index():
+    """build the index from the polygons in the osm table"""
+    import shapely
+
+    with SessionLocal() as session:
+        query = text(
+            """
+            SELECT locode, geometry FROM osm
+            WHERE geometry IS NOT NULL
+            ORDER BY locode;
+            """
+        )
+        rows = session.execute(query).fetchall()
+
+    locodes = [row.locode for row in rows]
+    geometries = shapely.from_wkt([row.geometry for row in rows], on_invalid="warn")
+
+    index = CityIndex(locodes, geometries)
+    logger.info(f"city index built with {len(index)} of {len(rows)} polygons")
+    return index
+
+
+_city_index = {"index": None}
+_city_index_lock = threading.Lock()
+
+
+def current_city_index():
+    """the loaded index, or None until the first load"""
+    return _city_index["index"]
+
+
+def city_index():
+    """the loaded index, building it on first use"""
+    with _city_index_lock:
+        if _city_index["index"] is None:
+            _city_index["index"] = load_city_index()
+        return _city_index["index"]
+
+
+def reload_city_index():
+    """rebuild the index, e.g. after the OSM data was reimported; requests
+    keep using the previous index until the new one is swapped in"""
+    index = load_city_index()
+    with _city_index_lock:
+        _city_index["index"] = index
+    return index